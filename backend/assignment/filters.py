@@ -1,10 +1,13 @@
 from django_filters import rest_framework as filters
+from core.filters import PeriodFilterSet
 from .models import Assignment
 
-class AssignmentFilter(filters.FilterSet):
+class AssignmentFilter(PeriodFilterSet):
     """
-    FilterSet for filtering Assignment objects based on various criteria.
+    FilterSet for filtering Assignment objects based on various criteria,
+    including the year, month, quarter and week of the assignment date.
     """
+    period_field = 'date_assignment'
 
     start_date = filters.DateFilter(field_name="date_assignment", lookup_expr='gte')
     """Filter for assignments starting from a specific date."""
@@ -32,4 +35,5 @@ class AssignmentFilter(filters.FilterSet):
         Meta class for AssignmentFilter.
         """
         model = Assignment
-        fields = ['start_date', 'end_date', 'seller_name', 'seller_last_name', 'seller_number_seller', 'seller_dni', 'product_type']
+        fields = ['start_date', 'end_date', 'seller_name', 'seller_last_name', 'seller_number_seller', 'seller_dni', 'product_type',
+                  'year', 'month', 'quarter', 'week']
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0001_initial'),
+        ('seller', '0004_seller_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['date_assignment', 'seller'], name='assignment_date_seller_idx'),
+        ),
+    ]
@@ -10,9 +10,24 @@ class Assignment(TimeStampedModel):
     date_assignment = models.DateField(null=False, blank=False, auto_now=False)
     seller = models.ForeignKey(Seller, on_delete=models.CASCADE, null=False, blank=False)
 
+    class Meta:
+        indexes = [
+            # Date ranges of the filters (core.filters.PeriodFilterSet) and the assignments of a day by seller
+            models.Index(fields=['date_assignment', 'seller'], name='assignment_date_seller_idx'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the assignment.
         """
         return self.seller.name + ' ' + f'{ self.date_assignment }'
-    
\ No newline at end of file
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Keeps the values loaded from the database, so the report signals can
+        refresh the daily sales the instance belonged to before a change.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
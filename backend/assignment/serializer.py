@@ -76,7 +76,8 @@ class AssignmentSerializer(serializers.HyperlinkedModelSerializer):
     def get_detail_assignments(self, obj):
         """
         Get detailed assignments related to the Assignment instance.
-        Filters by product_type if provided in request query params.
+        Filters by product_type if provided in request query params, unless
+        the viewset already prefetched them.
 
         Args:
             obj (Assignment): The Assignment instance.
@@ -86,6 +87,11 @@ class AssignmentSerializer(serializers.HyperlinkedModelSerializer):
         """
         from detail_assignment.serializer import DetailAssignmentSerializer
 
+        # Use the detail assignments prefetched (and filtered) by AssignmentViewSet
+        detail_assignments = getattr(obj, 'prefetched_detail_assignments', None)
+        if detail_assignments is not None:
+            return DetailAssignmentSerializer(detail_assignments, many=True).data
+
         # Get all detail assignments
         detail_assignments = obj.detailassignment_set.all()
 
@@ -110,16 +116,20 @@ class AssignmentSerializer(serializers.HyperlinkedModelSerializer):
         representation = super().to_representation(instance)
         from product.serializer import ProductSerializer
 
-        # Get all products
-        products = instance.products.all()
+        # Use the products prefetched (and filtered) by AssignmentViewSet
+        products = getattr(instance, 'prefetched_products', None)
 
-        # Filter by product_type if provided in request context
-        request = self.context.get('request')
-        if request and hasattr(request, 'query_params'):
-            product_type = request.query_params.get('product_type')
-            if product_type:
-                # Filter products by type
-                products = products.filter(type_product__type__iexact=product_type)
+        if products is None:
+            # Get all products
+            products = instance.products.all()
+
+            # Filter by product_type if provided in request context
+            request = self.context.get('request')
+            if request and hasattr(request, 'query_params'):
+                product_type = request.query_params.get('product_type')
+                if product_type:
+                    # Filter products by type
+                    products = products.filter(type_product__type__iexact=product_type)
 
         # Replace products IDs with full product details (filtered)
         representation['products'] = ProductSerializer(products, many=True).data
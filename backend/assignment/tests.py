@@ -1,3 +1,51 @@
-from django.test import TestCase
+import datetime
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from assignment.models import Assignment
+from detail_assignment.models import DetailAssignment
+from product.models import Product
+from report.models import DailySales
+from seller.models import Seller
+from type_product.models import TypeProduct
+
+
+@override_settings(CACHE_RESPONSES=True)
+class DailyReconciliationCacheTests(TestCase):
+    """
+    The cached daily reconciliation of closed days.
+    """
+    url = '/api/v1/reports/daily-reconciliation/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cashier', password='secret')
+        cls.date = datetime.date(2026, 10, 1)
+        cls.type_product = TypeProduct.objects.create(name='PRODUCTO', type='PRODUCT')
+        product = Product.objects.create(name='Libro', type_product=cls.type_product, base_price=10, total_quantity=100)
+        seller = Seller.objects.create(
+            name='Ana', last_name='Quispe', number_seller='CAN-1001', dni='10000001', status=True
+        )
+        assignment = Assignment.objects.create(seller=seller, date_assignment=cls.date)
+        DetailAssignment.objects.create(assignment=assignment, product=product, quantity=10, unit_price=10)
+        DailySales.objects.refresh([cls.date], [seller.id])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def type_products(self):
+        response = self.client.get(self.url, {'date': str(self.date)})
+        return [group['type_product'] for group in response.data[0]['by_type_product']]
+
+    def test_renaming_a_type_of_product_invalidates_the_cached_report(self):
+        self.assertEqual(self.type_products(), ['PRODUCTO'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.type_product.name = 'COMERCIO'
+            self.type_product.save()
+
+        self.assertEqual(self.type_products(), ['COMERCIO'])
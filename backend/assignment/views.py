@@ -1,5 +1,9 @@
-from django.db.models import Sum, F, ExpressionWrapper, DecimalField
-from django.db.models.functions import TruncMonth, TruncDay
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, F, Q, Value, ExpressionWrapper, DecimalField, Prefetch, prefetch_related_objects
+from django.db.models.functions import Coalesce, TruncMonth, TruncDay
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from django.utils import timezone
 from datetime import datetime
@@ -16,8 +20,13 @@ import pytz
 from assignment.models import Assignment
 from assignment.serializer import AssignmentSerializer
 from assignment.filters import AssignmentFilter
+from core.cache import build_cache_key, get_cache_version
 from core.pagination import CustomPagination
 from detail_assignment.models import DetailAssignment
+from product.models import Product
+from report.managers import RECONCILIATION_NAMESPACE
+from report.models import DailySales
+from report.reconciliation import daily_reconciliation
 
 
 class AssignmentViewSet(viewsets.ModelViewSet):
@@ -34,56 +43,89 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     pagination_class = CustomPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = AssignmentFilter
-
-    def total_pay(self, assignment):
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'list': {'queries': 6},
+        'retrieve': {'queries': 5},
+        'calculate_totals': {'queries': 3},
+    }
+
+    def get_prefetches(self):
         """
-        Helper method to calculate total payment.
-
-        Args:
-            assignment (Assignment): The assignment instance.
+        Build the prefetch plan of the nested detail assignments and products,
+        filtered by the `product_type` query parameter, so the serializer does
+        not query the database for each assignment.
 
         Returns:
-            float: The total payment.
+            list: The Prefetch objects.
         """
-        total_assignment = self.total_assignment(assignment)
-        total_returned = self.total_returned(assignment)
-        return total_assignment - total_returned
+        detail_assignments = DetailAssignment.objects.prefetch_related(
+            Prefetch('product', queryset=Product.objects.for_serializer())
+        ).order_by('id')
+        products = Product.objects.for_serializer().order_by('id')
+
+        product_type = self.request.query_params.get('product_type') if self.request else None
+        if product_type:
+            detail_assignments = detail_assignments.filter(product__type_product__type__iexact=product_type)
+            products = products.filter(type_product__type__iexact=product_type)
+
+        return [
+            Prefetch('detailassignment_set', queryset=detail_assignments, to_attr='prefetched_detail_assignments'),
+            Prefetch('products', queryset=products, to_attr='prefetched_products'),
+        ]
+
+    def get_queryset(self):
+        """
+        Returns the assignments with their seller, and for the read actions
+        the prefetched detail assignments and products.
+        """
+        queryset = super().get_queryset().select_related('seller')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(*self.get_prefetches())
+        return queryset
 
-    def total_assignment(self, assignment):
+    def with_totals(self, queryset):
         """
-        Helper method to calculate total assignment value.
+        Annotate the assigned, returned and payable totals of each assignment.
+
+        The totals are computed by the database in the same query that
+        fetches the assignments, ignoring soft deleted detail assignments.
 
         Args:
-            assignment (Assignment): The assignment instance.
+            queryset (QuerySet): The assignments to annotate.
 
         Returns:
-            float: The total assignment value.
+            QuerySet: The annotated assignments.
         """
-        details_assignment = DetailAssignment.objects.filter(assignment=assignment)
-        total = 0
-
-        for detail_assignment in details_assignment:
-            subtotal = detail_assignment.quantity * detail_assignment.unit_price
-            total += subtotal
-
-        return total
+        alive_details = Q(detailassignment__delete_at__isnull=True)
+        amount_field = DecimalField(max_digits=12, decimal_places=2)
+        zero = Value(0, output_field=amount_field)
+
+        return queryset.annotate(
+            total_assignment=Coalesce(Sum(
+                F('detailassignment__quantity') * F('detailassignment__unit_price'),
+                filter=alive_details, output_field=amount_field
+            ), zero),
+            total_returned=Coalesce(Sum(
+                F('detailassignment__returned_amount') * F('detailassignment__unit_price'),
+                filter=alive_details, output_field=amount_field
+            ), zero),
+        ).annotate(
+            total_pay=F('total_assignment') - F('total_returned')
+        )
 
-    def total_returned(self, assignment):
+    def get_totals(self, pk):
         """
-        Helper method to calculate total returned value.
+        Helper method to get an assignment with its totals in a single query.
 
         Args:
-            assignment (Assignment): The assignment instance.
+            pk (int): The primary key of the assignment.
 
         Returns:
-            float: The total returned value.
+            Assignment: The assignment annotated with its totals.
         """
-        details_assignment = DetailAssignment.objects.filter(assignment=assignment)
-        total = 0
-        for detail_assignment in details_assignment:
-            subtotal = detail_assignment.returned_amount * detail_assignment.unit_price
-            total += subtotal
-        return total
+        queryset = self.with_totals(self.get_queryset().select_related('seller'))
+        return get_object_or_404(queryset, pk=pk)
 
     @action(detail=True, methods=['get'], url_path='calculate-total-assignment')
     def get_total_assignment(self, request, pk=None):
@@ -97,15 +139,13 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         Returns:
             Response: The total assignment value.
         """
-        assignment = self.get_object()
-        total_assignment = self.total_assignment(assignment)
+        assignment = self.get_totals(pk)
 
         return Response({
             'assignment_id': assignment.id,
             'seller': assignment.seller.name,
             'date': assignment.date_assignment,
-            'status': assignment.status,
-            'total': total_assignment
+            'total': assignment.total_assignment
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'], url_path='calculate-total-returned')
@@ -120,15 +160,13 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         Returns:
             Response: The total returned value.
         """
-        assignment = self.get_object()
-        total_returned = self.total_returned(assignment)
+        assignment = self.get_totals(pk)
 
         return Response({
             'assignment_id': assignment.id,
             'seller': assignment.seller.name,
             'date': assignment.date_assignment,
-            'status': assignment.status,
-            'total': total_returned
+            'total': assignment.total_returned
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'], url_path='calculate-total-pay')
@@ -143,22 +181,85 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         Returns:
             Response: The total payment.
         """
-        assignment = self.get_object()
-        total_pay = self.total_pay(assignment)
+        assignment = self.get_totals(pk)
 
         return Response({
             'assignment_id': assignment.id,
             'seller': assignment.seller.name,
             'date': assignment.date_assignment,
-            'status': assignment.status,
-            'total_pay': total_pay
+            'total_pay': assignment.total_pay
         }, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path='calculate-totals')
+    def calculate_totals(self, request):
+        """
+        Calculate the assigned, returned and payable totals of many assignments.
+
+        The assignments are selected with the `ids` query parameter
+        (comma separated) or with the `date` and `seller_id` parameters.
+
+        Args:
+            request (Request): The request instance.
+
+        Returns:
+            Response: The totals of every selected assignment.
+        """
+        ids = request.query_params.get('ids')
+        date = request.query_params.get('date')
+        seller_id = request.query_params.get('seller_id')
+
+        if not ids and not date and not seller_id:
+            return Response({'error': 'ids, date or seller_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        assignments = self.get_queryset()
+
+        if ids:
+            try:
+                ids = [int(assignment_id) for assignment_id in ids.split(',') if assignment_id.strip()]
+            except ValueError:
+                return Response({'error': 'ids must be a comma separated list of integers'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            assignments = assignments.filter(id__in=ids)
+        if date:
+            try:
+                date = datetime.strptime(date, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': 'date must use the YYYY-MM-DD format'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            assignments = assignments.filter(date_assignment=date)
+        if seller_id:
+            try:
+                seller_id = int(seller_id)
+            except ValueError:
+                return Response({'error': 'seller_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            assignments = assignments.filter(seller_id=seller_id)
+
+        report = self.with_totals(assignments).values(
+            'id', 'seller__name', 'date_assignment', 'total_assignment', 'total_returned', 'total_pay'
+        ).order_by('id')
+
+        return Response([
+            {
+                'assignment_id': entry['id'],
+                'seller': entry['seller__name'],
+                'date': entry['date_assignment'],
+                'total_assignment': entry['total_assignment'],
+                'total_returned': entry['total_returned'],
+                'total_pay': entry['total_pay'],
+            }
+            for entry in report
+        ], status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], url_path='create-assignments')
     def create_assignments(self, request):
         """
         Create assignments for all active sellers.
 
+        Missing assignments are inserted with a single bulk insert and the
+        products of every assignment are replaced with bulk writes on the
+        `Product.assignments` through table, so the number of queries does
+        not grow with the number of sellers.
+
         Args:
             request (Request): The request instance.
 
@@ -170,38 +271,59 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         today = now_in_peru.date()
 
         product_ids = request.data.get('products', [])
-
-        active_sellers = Seller.objects.filter(status=True)
-
-        created_assignments = []
-        existing_assignments = []
-
-        for seller in active_sellers:
-            assignment, created = Assignment.objects.get_or_create(
+        if not isinstance(product_ids, list) or not all(
+            isinstance(product_id, int) and not isinstance(product_id, bool) for product_id in product_ids
+        ):
+            return Response({'error': 'products must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        product_ids = set(product_ids)
+        existing_product_ids = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        missing_product_ids = product_ids - existing_product_ids
+        if missing_product_ids:
+            return Response({'error': f'Products not found: {sorted(missing_product_ids)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        active_sellers = {seller.id: seller for seller in Seller.objects.filter(status=True)}
+
+        with transaction.atomic():
+            existing_assignments = list(Assignment.objects.filter(
                 date_assignment=today,
-                seller=seller
-            )
-
-            assignment.products.set(product_ids)
-
-            if created:
-                created_assignments.append(assignment)
-            else:
-                existing_assignments.append(assignment)
-
-
-        serializer = AssignmentSerializer(created_assignments + existing_assignments, many=True)
+                seller_id__in=active_sellers.keys()
+            ))
+            assigned_seller_ids = {assignment.seller_id for assignment in existing_assignments}
+
+            created_assignments = Assignment.objects.bulk_create([
+                Assignment(date_assignment=today, seller=seller)
+                for seller_id, seller in active_sellers.items()
+                if seller_id not in assigned_seller_ids
+            ])
+
+            assignments = created_assignments + existing_assignments
+            assignment_ids = [assignment.id for assignment in assignments]
+
+            # Equivalent to assignment.products.set(product_ids) for every assignment
+            ProductAssignment = Product.assignments.through
+            ProductAssignment.objects.filter(assignment_id__in=assignment_ids).exclude(
+                product_id__in=product_ids
+            ).delete()
+            ProductAssignment.objects.bulk_create([
+                ProductAssignment(assignment_id=assignment_id, product_id=product_id)
+                for assignment_id in assignment_ids
+                for product_id in product_ids
+            ], ignore_conflicts=True)
+
+        # Reuse the sellers already in memory and load the nested data in bulk
+        for assignment in assignments:
+            assignment.seller = active_sellers[assignment.seller_id]
+        prefetch_related_objects(assignments, *self.get_prefetches())
+
+        serializer = self.get_serializer(assignments, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['delete'], url_path='delete-assignments')
     def delete_assignments(self, request):
         peru_tz = pytz.timezone('America/Lima')
         today = timezone.now().astimezone(peru_tz).date()
-        all_assignments = Assignment.objects.filter(date_assignment=today)
-
-        for assignment in all_assignments:
-            assignment.soft_delete()
-
+        Assignment.objects.filter(date_assignment=today).soft_delete()
 
         return Response(status=status.HTTP_200_OK)
 
@@ -214,6 +336,13 @@ class ReportViewSet(viewsets.ViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    # Longest range of the daily reconciliation, in days
+    reconciliation_max_days = 366
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'daily_reconciliation': {'queries': 5},
+    }
+
     @action(detail=False, methods=['get'], url_path='sales-by-seller')
     def sales_by_seller(self, request):
         start_date = request.query_params.get('start_date')
@@ -222,14 +351,13 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date]
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date]
         ).values(
-            'assignment__seller__name'
+            assignment__seller__name=F('seller__name')
         ).annotate(
             total_sold=Sum(F('quantity') - F('returned_amount')),
-            total_amount=Sum(ExpressionWrapper((F('quantity') - F('returned_amount')) * F('unit_price'),
-                                               output_field=DecimalField()))
+            total_amount=Sum(F('assigned_total') - F('returned_total'))
         ).order_by('-total_amount')
 
         return Response(report, status=status.HTTP_200_OK)
@@ -242,14 +370,14 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date],
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date],
             product__type_product__type='NEWSPAPER'
         ).values(
             'product__name'
         ).annotate(
             total_sold=Sum('quantity'),
-            total_amount=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField()))
+            total_amount=Sum('assigned_total')
         ).order_by('-total_sold')
 
         return Response(report, status=status.HTTP_200_OK)
@@ -262,14 +390,14 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date],
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date],
             product__type_product__type='PRODUCT'
         ).values(
             'product__name'
         ).annotate(
             total_sold=Sum('quantity'),
-            total_amount=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField()))
+            total_amount=Sum('assigned_total')
         ).order_by('-total_sold')
 
         return Response(report, status=status.HTTP_200_OK)
@@ -282,21 +410,17 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date]
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date]
         ).values(
-            'assignment__seller__name'
+            assignment__seller__name=F('seller__name')
         ).annotate(
             total_sold=Sum('quantity'),
             total_returned=Sum('returned_amount'),
             return_percentage=ExpressionWrapper(
                 F('total_returned') * 100.0 / F('total_sold'), output_field=DecimalField()
             ),
-            impact_on_sales=Sum(
-                ExpressionWrapper(
-                    F('returned_amount') * F('unit_price'), output_field=DecimalField()
-                )
-            )
+            impact_on_sales=Sum('returned_total')
         ).order_by('assignment__seller__name')
 
         return Response(report, status=status.HTTP_200_OK)
@@ -309,17 +433,12 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date]
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date]
         ).values(
-            'assignment__seller__name'
+            assignment__seller__name=F('seller__name')
         ).annotate(
-            total_profit=Sum(
-                ExpressionWrapper(
-                    F('quantity') * F('unit_price') - F('returned_amount') * F('unit_price'),
-                    output_field=DecimalField()
-                )
-            )
+            total_profit=Sum(F('assigned_total') - F('returned_total'))
         ).order_by('-total_profit')
 
         return Response(report, status=status.HTTP_200_OK)
@@ -332,17 +451,14 @@ class ReportViewSet(viewsets.ViewSet):
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment__range=[start_date, end_date]
+        report = DailySales.objects.filter(
+            date__range=[start_date, end_date]
         ).annotate(
-            month=TruncMonth('assignment__date_assignment')
+            month=TruncMonth('date')
         ).values(
             'month'
         ).annotate(
-            total_earnings=Sum(ExpressionWrapper(
-                (F('quantity') - F('returned_amount')) * F('unit_price'),
-                output_field=DecimalField()
-            ))
+            total_earnings=Sum(F('assigned_total') - F('returned_total'))
         ).order_by('month')
 
         # Format the month to the last day of the month
@@ -364,17 +480,14 @@ class ReportViewSet(viewsets.ViewSet):
         peru_tz = pytz.timezone('America/Lima')
         today = timezone.now().astimezone(peru_tz).date()
 
-        report = DetailAssignment.objects.filter(
-            assignment__date_assignment=today
+        report = DailySales.objects.filter(
+            date=today
         ).annotate(
-            day=TruncDay('assignment__date_assignment')
+            day=TruncDay('date')
         ).values(
             'day'
         ).annotate(
-            total_earnings=Sum(ExpressionWrapper(
-                (F('quantity') - F('returned_amount')) * F('unit_price'),
-                output_field=DecimalField()
-            ))
+            total_earnings=Sum(F('assigned_total') - F('returned_total'))
         ).order_by('day')
 
         formatted_report = []
@@ -384,4 +497,52 @@ class ReportViewSet(viewsets.ViewSet):
                 'total_earnings': entry['total_earnings']
             })
 
-        return Response(formatted_report, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(formatted_report, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='daily-reconciliation')
+    def daily_reconciliation(self, request):
+        """
+        Reconcile the expected sales of each day with the cash counted, the
+        Yape receipts and the finance records, for `date` or for the range
+        from `start_date` to `end_date` (today in Peru by default).
+
+        The report runs a fixed number of grouped queries for any range (see
+        report.reconciliation). Ranges of closed days (before today) are
+        cached until the sales, cash, Yape payments, finance records or types
+        of product (which name the groups) change (when `CACHE_RESPONSES` is on).
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: One row per day with the expected sales, the money
+                collected and the differences.
+        """
+        today = timezone.now().astimezone(pytz.timezone('America/Lima')).date()
+        start_date = request.query_params.get('start_date') or request.query_params.get('date')
+        end_date = request.query_params.get('end_date') or request.query_params.get('date')
+        try:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else today
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else start_date
+        except ValueError:
+            return Response({"error": "Invalid date, use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if end_date < start_date:
+            return Response({"error": "end_date must not be before start_date"}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= self.reconciliation_max_days:
+            return Response({"error": f"The range cannot be longer than {self.reconciliation_max_days} days"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if end_date >= today or not settings.CACHE_RESPONSES:
+            return Response(daily_reconciliation(start_date, end_date), status=status.HTTP_200_OK)
+
+        # Closed days only change when their records are edited, which moves one of these versions
+        cache_key = build_cache_key(
+            RECONCILIATION_NAMESPACE, start_date, end_date, get_cache_version('cash'), get_cache_version('yapes'),
+            get_cache_version('type_products')
+        )
+        report = cache.get(cache_key)
+        if report is None:
+            report = daily_reconciliation(start_date, end_date)
+            cache.set(cache_key, report, settings.CACHE_RESPONSE_TIMEOUT)
+        return Response(report, status=status.HTTP_200_OK)
@@ -5,3 +5,5 @@ class CashConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cash'
 
+    def ready(self):
+        import cash.signals  # noqa: F401
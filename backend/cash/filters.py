@@ -1,14 +1,17 @@
 import django_filters
+from core.filters import PeriodFilterSet
 from .models import Cash
 
 
-class CashFilter(django_filters.FilterSet):
+class CashFilter(PeriodFilterSet):
     """
     FilterSet for the Cash model that allows filtering by:
     - Specific date
     - Date range (from and to)
     - Combination of both
+    - Year, month, quarter and week (see PeriodFilterSet)
     """
+    period_field = 'date_cash'
     
     # Filter by specific date
     date_cash = django_filters.DateFilter(
@@ -30,18 +33,6 @@ class CashFilter(django_filters.FilterSet):
         label='Date to (YYYY-MM-DD)'
     )
     
-    # Filter by year
-    year = django_filters.NumberFilter(
-        field_name='date_cash__year',
-        label='Year'
-    )
-    
-    # Filter by month
-    month = django_filters.NumberFilter(
-        field_name='date_cash__month',
-        label='Month (1-12)'
-    )
-    
     # Filter by total range
     total_min = django_filters.NumberFilter(
         field_name='total',
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cash.models import Cash
+from core.cache import bump_cache_version
+
+
+class Command(BaseCommand):
+    """
+    Recompute the stored totals of the cash counts from their denominations.
+    """
+    help = 'Recompute the total of every cash count from its denomination counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Cash counts read per batch.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be greater than 0.')
+
+        updated = Cash.objects.recompute_totals(options['batch_size'])
+        if updated:
+            # The bulk update does not send the signals that invalidate the cached responses
+            bump_cache_version('cash')
+        self.stdout.write(self.style.SUCCESS(f'{updated} cash total(s) recomputed.'))
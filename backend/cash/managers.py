@@ -0,0 +1,16 @@
+from core.managers import SoftDeleteManager
+from .querysets import CashQuerySet
+
+
+class CashManager(SoftDeleteManager):
+    """
+    Manager class of the alive cash counts.
+    """
+    queryset_class = CashQuerySet
+
+    def recompute_totals(self, batch_size=1000):
+        """
+        Recompute the stored totals of the alive cash counts. See
+        CashQuerySet.recompute_totals.
+        """
+        return self.get_queryset().recompute_totals(batch_size)
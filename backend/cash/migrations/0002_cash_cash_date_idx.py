@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cash',
+            index=models.Index(fields=['date_cash'], name='cash_date_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from decimal import Decimal
 from django.db import models
 from core.models import TimeStampedModel
+from .managers import CashManager
 
 # Create your models here.
 class Cash(TimeStampedModel):
@@ -12,6 +14,21 @@ class Cash(TimeStampedModel):
         ('COMERCIO', 'COMERCIO'),
     )
 
+    # Count field and value in cents of each denomination
+    DENOMINATIONS = (
+        ('two_hundred', 20000),
+        ('one_hundred', 10000),
+        ('fifty', 5000),
+        ('twenty', 2000),
+        ('ten', 1000),
+        ('five', 500),
+        ('two', 200),
+        ('one', 100),
+        ('fifty_cents', 50),
+        ('twenty_cents', 20),
+        ('ten_cents', 10),
+    )
+
     date_cash = models.DateField(null=False, blank=False, auto_now=False)
     type_product = models.CharField(max_length=8, choices=TYPE_PRODUCT, default='COMERCIO')
     two_hundred = models.IntegerField(null=True, blank=True)
@@ -27,6 +44,35 @@ class Cash(TimeStampedModel):
     ten_cents = models.IntegerField(null=True, blank=True)
     total = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
 
+    objects = CashManager()
+
+    class Meta:
+        indexes = [
+            # Date ranges of the filters (core.filters.PeriodFilterSet) and reports
+            models.Index(fields=['date_cash'], name='cash_date_idx'),
+        ]
+
     def __str__(self):
         return f'{self.date_cash}' + ' ' + f'{self.total}'
-    
\ No newline at end of file
+
+    @classmethod
+    def total_from_counts(cls, counts):
+        """
+        Returns the exact total of the denomination counts, summed in integer
+        cents. Missing and None counts count as 0.
+
+        Args:
+            counts (dict): Count by denomination field.
+
+        Returns:
+            Decimal: The total, with two decimal places.
+        """
+        cents = sum((counts.get(field) or 0) * value for field, value in cls.DENOMINATIONS)
+        return Decimal(cents).scaleb(-2)
+
+    def calculate_total(self):
+        """
+        Sets the total from the denomination counts of the instance.
+        """
+        self.total = self.total_from_counts({field: getattr(self, field) for field, _ in self.DENOMINATIONS})
+        return self.total
@@ -0,0 +1,72 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from core.querysets import SoftDeleteQuerySet
+
+
+def total_expression():
+    """
+    Returns the SQL expression of the total of a cash count: the sum in
+    integer cents of every denomination (NULL counts as 0), scaled to soles.
+    Same arithmetic as Cash.total_from_counts.
+    """
+    from .models import Cash
+
+    zero = Value(0, output_field=IntegerField())
+    cents = sum((Coalesce(F(field), zero) * value for field, value in Cash.DENOMINATIONS), start=zero)
+    return ExpressionWrapper(cents * Value(Decimal('0.01')), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+class CashQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of cash counts with the totals computed in the database.
+    """
+
+    def recompute_totals(self, batch_size=1000):
+        """
+        Recompute the stored total of every cash count from its denomination
+        counts, with one UPDATE per batch of ids and only for the counts whose
+        total changed.
+
+        Like QuerySet.update, it does not send the signals that invalidate the
+        cached responses, so the caller bumps the `cash` cache version.
+
+        Args:
+            batch_size (int): Cash counts read per batch.
+
+        Returns:
+            int: The number of cash counts updated.
+        """
+        queryset = self.annotate(computed_total=total_expression())
+        stale = Q(total__isnull=True) | ~Q(total=F('computed_total'))
+
+        updated, last_id = 0, 0
+        while True:
+            ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return updated
+            last_id = ids[-1]
+            with transaction.atomic(using=self.db):
+                stale_ids = list(queryset.filter(stale, pk__in=ids).values_list('pk', flat=True))
+                if stale_ids:
+                    updated += self.model.all_objects.using(self.db).filter(pk__in=stale_ids).update(
+                        total=total_expression()
+                    )
+
+    def denomination_totals(self, *fields):
+        """
+        Group the cash counts by the given fields (or expressions annotated
+        with those names) with a single grouped query.
+
+        Returns:
+            QuerySet: One row per group with its `count` and the summed count
+                of every denomination.
+        """
+        from .models import Cash
+
+        zero = Value(0, output_field=IntegerField())
+        return self.values(*fields).annotate(
+            count=Count('id'),
+            **{f'sum_{field}': Coalesce(Sum(field), zero) for field, _ in Cash.DENOMINATIONS},
+        ).order_by(*fields)
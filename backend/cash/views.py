@@ -1,19 +1,26 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models.functions import TruncMonth
 
 from .models import Cash
 from .serializer import CashSerializer
 from .filters import CashFilter
+from core.mixins import CacheResponseMixin
 from core.pagination import CustomPagination
 
 # Create your views here.
-class CashViewSet(viewsets.ModelViewSet):
+class CashViewSet(CacheResponseMixin, viewsets.ModelViewSet):
     # JWT authentication
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    # Cache of list and retrieve, invalidated by cash.signals
+    cache_namespace = 'cash'
+
     queryset = Cash.objects.all().order_by('-date_cash')
     serializer_class = CashSerializer
     pagination_class = CustomPagination
@@ -21,3 +28,59 @@ class CashViewSet(viewsets.ModelViewSet):
     # Settings of filters
     filter_backends = [DjangoFilterBackend]
     filterset_class = CashFilter
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'totals': {'queries': 2},
+    }
+
+    # Groups of the totals action: output key and expression to group by
+    TOTALS_GROUPS = {
+        'day': ('date_cash', None),
+        'month': ('month', TruncMonth('date_cash')),
+        'type_product': ('type_product', None),
+    }
+
+    @action(detail=False, methods=['get'], url_path='totals')
+    def totals(self, request):
+        """
+        Totals and denomination breakdowns of the filtered cash counts, grouped
+        by `group_by`: a comma separated list of `day`, `month` and
+        `type_product` (`day` by default), e.g. `?group_by=month,type_product`.
+
+        Every group comes from a single grouped query and its total is summed
+        in integer cents from the denomination counts. The response is cached
+        with the list.
+
+        Args:
+            request (Request): The request object with the filters of CashFilter.
+
+        Returns:
+            Response: One row per group with its count, total and denominations.
+        """
+        groups = [group for group in request.query_params.get('group_by', 'day').split(',') if group]
+        invalid = [group for group in groups if group not in self.TOTALS_GROUPS]
+        if invalid or not groups:
+            return Response({'error': f'Invalid group_by, use: {", ".join(self.TOTALS_GROUPS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return self.cached_response(request, self.get_totals, groups)
+
+    def get_totals(self, request, groups):
+        queryset = self.filter_queryset(Cash.objects.all())
+        fields = []
+        for group in dict.fromkeys(groups):
+            field, expression = self.TOTALS_GROUPS[group]
+            if expression is not None:
+                queryset = queryset.annotate(**{field: expression})
+            fields.append(field)
+
+        results = []
+        for row in queryset.denomination_totals(*fields):
+            denominations = {field: row[f'sum_{field}'] for field, _ in Cash.DENOMINATIONS}
+            result = {field: row[field] for field in fields}
+            if 'month' in result:
+                result['month'] = result['month'].strftime('%Y-%m')
+            result['count'] = row['count']
+            result['total'] = Cash.total_from_counts(denominations)
+            result['denominations'] = denominations
+            results.append(result)
+        return Response(results, status=status.HTTP_200_OK)
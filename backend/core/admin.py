@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.apps import apps
 from .models import TimeStampedModel
+from .querysets import SoftDeleteQuerySet
 
 class TimeStampedModelAdmin(admin.ModelAdmin):
     """Class to manage the TimeStampedModel in the Django Admin"""
@@ -14,18 +15,15 @@ class TimeStampedModelAdmin(admin.ModelAdmin):
 
     def restore_objects(self, request, queryset):
         """Action to restore the objects"""
-        count = queryset.update(delete_at=None)
+        # Restore through the queryset so the post_restore receivers run
+        count = SoftDeleteQuerySet(self.model, using=queryset.db).filter(pk__in=queryset.values('pk')).restore()
         self.message_user(request, f"{count} object(s) restored.")
 
     restore_objects.short_description = "Restore objects"
 
     def delete_objects(self, request, queryset):
         """Action to soft delete the objects"""
-        count = 0
-        for obj in queryset:
-            if not obj.is_deleted:
-                obj.soft_delete()
-                count += 1
+        count = self.model.objects.filter(pk__in=queryset.values('pk')).soft_delete()
         self.message_user(request, f"{count} object(s) deleted softly.")
 
     delete_objects.short_description = "Delete objects softly"
@@ -0,0 +1,45 @@
+import hashlib
+import time
+from django.core.cache import cache
+
+
+def get_cache_version_key(namespace):
+    """
+    Returns the cache key that stores the version of a namespace.
+    """
+    return f'cache_version:{namespace}'
+
+
+def get_cache_version(namespace):
+    """
+    Returns the current version of a cache namespace.
+
+    A missing version starts at the current time instead of 1, so a version
+    evicted from the cache never brings back entries of an older version.
+    """
+    key = get_cache_version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """
+    Invalidates every entry of a cache namespace by moving it to a new version.
+    """
+    key = get_cache_version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def build_cache_key(namespace, *parts):
+    """
+    Builds a key inside the current version of a namespace. The parts are
+    hashed so long query strings still make valid keys for any backend.
+    """
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{namespace}:{get_cache_version(namespace)}:{digest}'
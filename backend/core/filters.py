@@ -0,0 +1,105 @@
+import datetime
+from django import forms
+from django_filters import rest_framework as filters
+
+
+def period_range(year, month=None, quarter=None, week=None):
+    """
+    Returns the half-open date range [start, end) of a period of a year, so
+    the period can be filtered with `field__gte=start, field__lt=end`, which
+    uses an index on the date column, instead of `field__month` or
+    `field__week`, which compile to EXTRACT(...) and cannot.
+
+    When several periods are given the range is their intersection (e.g. a
+    week in the first days of a month), which may be empty (start >= end).
+
+    Args:
+        year (int): The year (the ISO year for `week`).
+        month (int, optional): The month, 1 to 12.
+        quarter (int, optional): The quarter, 1 to 4.
+        week (int, optional): The ISO week, 1 to 53.
+
+    Returns:
+        tuple: The first day of the period and the first day after it.
+
+    Raises:
+        ValueError: If a value is out of range, e.g. week 53 of a year with 52 weeks.
+    """
+    start, end = datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+    ranges = []
+    if month is not None:
+        ranges.append((datetime.date(year, month, 1), next_month(year, month)))
+    if quarter is not None:
+        if not 1 <= quarter <= 4:
+            raise ValueError('quarter must be in 1..4')
+        ranges.append((datetime.date(year, 3 * quarter - 2, 1), next_month(year, 3 * quarter)))
+    if week is not None:
+        # ISO weeks may start in the previous year or end in the next one
+        week_start = datetime.date.fromisocalendar(year, week, 1)
+        start, end = week_start, week_start + datetime.timedelta(days=7)
+
+    for range_start, range_end in ranges:
+        start, end = max(start, range_start), min(end, range_end)
+    return start, end
+
+
+def next_month(year, month):
+    """
+    Returns the first day of the month after the given one.
+    """
+    return datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)
+
+
+class IntegerFilter(filters.NumberFilter):
+    """
+    NumberFilter that only accepts whole numbers, so `2024.7` is a validation
+    error instead of being truncated.
+    """
+    field_class = forms.IntegerField
+
+
+class PeriodFilterSet(filters.FilterSet):
+    """
+    FilterSet with `year`, `month`, `quarter` and `week` (ISO) filters on the
+    date field named by `period_field`, applied as a half-open date range
+    (see period_range) so they can use the index of the field.
+
+    `month`, `quarter` and `week` without `year` keep matching that period of
+    every year, which needs an EXTRACT and cannot use the index.
+
+    Attributes:
+        period_field (str): The date field filtered by the period.
+    """
+    period_field = None
+    period_params = ('year', 'month', 'quarter', 'week')
+
+    year = IntegerFilter(method='filter_period', min_value=1, max_value=9998, label='Year')
+    month = IntegerFilter(method='filter_period', min_value=1, max_value=12, label='Month (1-12)')
+    quarter = IntegerFilter(method='filter_period', min_value=1, max_value=4, label='Quarter (1-4)')
+    week = IntegerFilter(method='filter_period', min_value=1, max_value=53, label='ISO week (1-53)')
+
+    def filter_period(self, queryset, name, value):
+        # The period parameters are applied together in filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        period = {
+            name: self.form.cleaned_data[name]
+            for name in self.period_params
+            if self.form.cleaned_data.get(name) is not None
+        }
+        if not period:
+            return queryset
+
+        year = period.pop('year', None)
+        if year is None:
+            return queryset.filter(**{f'{self.period_field}__{name}': value for name, value in period.items()})
+
+        try:
+            start, end = period_range(year, **period)
+        except ValueError:
+            return queryset.none()
+        return queryset.filter(**{f'{self.period_field}__gte': start, f'{self.period_field}__lt': end})
@@ -5,8 +5,10 @@ class SoftDeleteManager(models.Manager):
     """
     Manager class to handle soft-deleted objects.
     """
+    queryset_class = SoftDeleteQuerySet
+
     def get_queryset(self):
         """
         Returns a queryset that filters out soft-deleted objects.
         """
-        return SoftDeleteQuerySet(self.model, using=self._db).alive()
\ No newline at end of file
+        return self.queryset_class(self.model, using=self._db).alive()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import logging
+import time
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('core.query_budget')
+
+
+class QueryTracker:
+    """
+    Database execute wrapper that counts the queries of a request and the
+    time spent running them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware that records the query count, SQL time, Python time and
+    response rendering time of each request, exposes them in a
+    `Server-Timing` header and logs the requests that exceed the budget
+    of their view.
+
+    The default budget comes from the QUERY_BUDGET setting. Viewsets can
+    declare a budget per action with a `query_budgets` attribute:
+
+        query_budgets = {
+            'list': {'queries': 8},
+            'retrieve': {'queries': 6, 'sql_ms': 50},
+        }
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.default_budget = getattr(settings, 'QUERY_BUDGET', {})
+        self.server_timing = getattr(settings, 'QUERY_BUDGET_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        request._query_budget = dict(self.default_budget)
+        request._query_budget_view = None
+        request._render_start = None
+        tracker = QueryTracker()
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(tracker):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        render = time.perf_counter() - request._render_start if request._render_start else 0.0
+        render = min(render, total)
+        python = max(total - tracker.duration - render, 0.0)
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'sql;dur={tracker.duration * 1000:.1f};desc="{tracker.count} queries"',
+                f'python;dur={python * 1000:.1f}',
+                f'render;dur={render * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        self.check_budget(request, tracker, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Resolve the budget of the DRF action that is about to run.
+        """
+        view_class = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        if view_class is None:
+            return None
+
+        request._query_budget_view = f'{view_class.__name__}.{action}' if action else view_class.__name__
+        budgets = getattr(view_class, 'query_budgets', {})
+        if action in budgets:
+            request._query_budget.update(budgets[action])
+        return None
+
+    def process_template_response(self, request, response):
+        """
+        DRF responses are rendered right after this hook, so the time from
+        here to the end of the request is the rendering time (the serializers
+        run before, in the view, and count as Python time).
+        """
+        request._render_start = time.perf_counter()
+        return response
+
+    def check_budget(self, request, tracker, total):
+        budget = request._query_budget
+        max_queries = budget.get('queries')
+        max_sql_ms = budget.get('sql_ms')
+        sql_ms = tracker.duration * 1000
+
+        over_queries = max_queries is not None and tracker.count > max_queries
+        over_sql = max_sql_ms is not None and sql_ms > max_sql_ms
+        if over_queries or over_sql:
+            logger.warning(
+                'Query budget exceeded by %s %s (%s): %d queries (budget %s), %.1f ms SQL (budget %s), %.1f ms total',
+                request.method, request.path, request._query_budget_view or 'unknown view',
+                tracker.count, max_queries, sql_ms, max_sql_ms, total * 1000,
+            )
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import build_cache_key
+
+
+class CacheResponseMixin:
+    """
+    Mixin for viewsets that serves `list` and `retrieve` from the cache.
+
+    The responses are stored in the versioned namespace of the model, keyed
+    on the action, the primary key and the query string, and the namespace
+    is invalidated by `core.signals.register_cache_invalidation_signals`.
+    The views run uncached when `CACHE_RESPONSES` is off.
+
+    Attributes:
+        cache_namespace (str): The namespace registered for the model.
+        cache_timeout (int): Seconds a response stays cached.
+    """
+    cache_namespace = None
+    cache_timeout = settings.CACHE_RESPONSE_TIMEOUT
+
+    def get_cache_key(self, request, **kwargs):
+        """
+        Returns the cache key of the current action and query string.
+        """
+        query_string = sorted(request.query_params.lists())
+        return build_cache_key(self.cache_namespace, self.action, kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''), query_string)
+
+    def cached_response(self, request, view, *args, **kwargs):
+        """
+        Returns the cached response of the view or runs it and caches its data.
+        """
+        if not settings.CACHE_RESPONSES:
+            return view(request, *args, **kwargs)
+
+        cache_key = self.get_cache_key(request, **kwargs)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(cache_key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
@@ -1,7 +1,8 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 from core.managers import SoftDeleteManager
+from core.querysets import SoftDeleteQuerySet
 
 class TimeStampedModel(models.Model):
     """
@@ -33,14 +34,11 @@ class TimeStampedModel(models.Model):
                     setattr(self, f'original_{field.name}', original_value)
                     setattr(self, field.name, f'{truncated_value}_{unique_suffix}')
 
-        self.delete_at = now()
-        self.save()
+        with transaction.atomic(using=self._state.db):
+            self.delete_at = now()
+            self.save()
 
-        for related_object in self._meta.related_objects:
-            related_name = related_object.get_accessor_name()
-            related_manager = getattr(self, related_name)
-            if isinstance(related_manager, models.Manager):
-                related_manager.all().update(delete_at=now())
+            SoftDeleteQuerySet(type(self), using=self._state.db).filter(pk=self.pk).soft_delete_related(self.delete_at)
 
     def restore(self):
         """
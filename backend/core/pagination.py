@@ -1,4 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class CustomPagination(PageNumberPagination):
     """
@@ -7,6 +15,171 @@ class CustomPagination(PageNumberPagination):
     Attributes:
         page_size (int): The default number of items per page.
         page_size_query_param (str): The query parameter name for specifying the page size.
+        max_page_size (int): The maximum page size a client can request.
     """
     page_size = 20
-    page_size_query_param = 'page_size'
\ No newline at end of file
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination that filters on the values of the last row
+    seen instead of using an offset, and does not count the rows, so every
+    page costs the same as the first one.
+
+    The ordering comes from the `keyset_ordering` attribute of the view and
+    must end with a unique column (usually `id`), e.g. ('-date_finance', '-id').
+
+    Attributes:
+        page_size (int): The default number of items per page.
+        page_size_query_param (str): The query parameter name for specifying the page size.
+        max_page_size (int): The maximum page size a client can request.
+        cursor_query_param (str): The query parameter name of the cursor.
+        ordering (tuple): The ordering used when the view does not define one.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+
+        reverse, values = self.decode_cursor(request, queryset.model)
+        ordering = tuple(self.invert(field) for field in self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.build_filter(ordering, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Going backwards there is always a next page (the one we came from)
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+        self.results = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def build_filter(ordering, values):
+        """
+        Build the condition of the rows after the cursor, e.g. for
+        ('-date', '-id'): date < d OR (date = d AND id < i).
+        """
+        condition = Q()
+        for position, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {ordering[index].lstrip('-'): values[index] for index in range(position)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[position]})
+        return condition
+
+    def get_values(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, reverse, obj):
+        payload = json.dumps({'r': reverse, 'v': self.get_values(obj)}, default=str)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """
+        Returns the direction and the ordering values of the cursor, converted
+        with the model fields so a tampered cursor fails here instead of in the
+        query.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            reverse, values = bool(payload['r']), list(payload['v'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(False, self.results[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.results:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(True, self.results[0])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptionalKeysetPagination(CustomPagination):
+    """
+    Page number pagination that switches to KeysetPagination when the client
+    opts in with `?pagination=keyset` or sends a `cursor`.
+    """
+    mode_query_param = 'pagination'
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        params = request.query_params
+        if params.get(self.mode_query_param) == 'keyset' or self.keyset_pagination_class.cursor_query_param in params:
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,5 +1,36 @@
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat, Left
 from django.utils import timezone
+from core.signals import post_restore, pre_soft_delete
+
+
+def is_soft_deletable(model):
+    """
+    Returns True if the model keeps soft deleted records (has a delete_at field).
+    """
+    return any(field.name == 'delete_at' for field in model._meta.concrete_fields)
+
+
+def unique_suffix_updates(model, unique_suffix):
+    """
+    Build the update expressions that append a suffix to the unique fields of
+    the model, so a soft deleted record does not block new records with the
+    same values. Mirrors what TimeStampedModel.soft_delete does per object.
+    """
+    updates = {}
+    for field in model._meta.concrete_fields:
+        if field.unique and not field.primary_key and isinstance(field, models.CharField) and field.max_length:
+            truncated_value = Left(F(field.name), field.max_length - len(unique_suffix) - 1)
+            updates[field.name] = Case(
+                When(**{f'{field.name}__isnull': False},
+                     then=Concat(truncated_value, Value(f'_{unique_suffix}'), output_field=field)),
+                default=F(field.name),
+                output_field=field,
+            )
+    return updates
+
 
 class SoftDeleteQuerySet(models.QuerySet):
     """
@@ -18,6 +49,73 @@ class SoftDeleteQuerySet(models.QuerySet):
         """
         return super().delete()
 
+    def soft_delete(self):
+        """
+        Soft delete the records and, in cascade, every record that depends on
+        them through a CASCADE foreign key, at any depth.
+
+        Each model of the relation graph is updated with a single UPDATE that
+        selects its rows with a subquery on its parent, so the number of
+        statements does not depend on the number of records.
+
+        Returns:
+            int: The number of records soft deleted (without the cascade).
+        """
+        deleted_at = timezone.now()
+        unique_suffix = str(uuid.uuid4().hex)[:4]
+
+        with transaction.atomic(using=self.db):
+            self.soft_delete_related(deleted_at)
+            pre_soft_delete.send(sender=self.model, queryset=self.alive())
+            return super().update(delete_at=deleted_at, **unique_suffix_updates(self.model, unique_suffix))
+
+    def soft_delete_related(self, deleted_at=None, _path=()):
+        """
+        Soft delete the alive records that depend on these records through a
+        CASCADE foreign key, deepest relations first. The records themselves
+        are not modified.
+
+        Args:
+            deleted_at (datetime, optional): The deletion time, now by default.
+        """
+        deleted_at = deleted_at or timezone.now()
+        path = _path + (self.model,)
+        parents = self.values('pk')
+
+        for related_object in self.model._meta.related_objects:
+            related_model = related_object.related_model
+            if not (related_object.one_to_many or related_object.one_to_one):
+                continue
+            if related_object.on_delete is not models.CASCADE or related_model in path:
+                continue
+            if not is_soft_deletable(related_model):
+                continue
+
+            children = SoftDeleteQuerySet(related_model, using=self.db).filter(
+                **{f'{related_object.field.name}__in': parents}
+            ).alive()
+            children.soft_delete_related(deleted_at, path)
+            pre_soft_delete.send(sender=related_model, queryset=children)
+            children.update(delete_at=deleted_at)
+
+    def restore(self):
+        """
+        Restore the soft deleted records with a single UPDATE and send
+        post_restore, so the data derived from the alive records (daily sales,
+        cached responses) follows. Restoring does not cascade.
+
+        Returns:
+            int: The number of records restored.
+        """
+        with transaction.atomic(using=self.db):
+            ids = list(self.dead().values_list('pk', flat=True))
+            if not ids:
+                return 0
+            restored = SoftDeleteQuerySet(self.model, using=self.db).filter(pk__in=ids)
+            count = restored.update(delete_at=None)
+            post_restore.send(sender=self.model, queryset=restored)
+            return count
+
     def alive(self):
         """
         Filter the records that are not soft deleted (delete_at is null).
@@ -28,4 +126,4 @@ class SoftDeleteQuerySet(models.QuerySet):
         """
         Filter the records that are soft deleted (delete_at is not null).
         """
-        return self.filter(delete_at__isnull=False)
\ No newline at end of file
+        return self.filter(delete_at__isnull=False)
@@ -0,0 +1,43 @@
+"""
+Substring search with relevance ranking.
+
+The filter is a case insensitive `icontains` on each field, which on
+PostgreSQL compiles to UPPER(field) LIKE '%term%' and is served by the
+pg_trgm GIN indexes on UPPER(field) declared by the models. On PostgreSQL
+the results are ranked by trigram word similarity to the term, so the best
+match comes first; other databases keep the default ordering.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+
+def search_queryset(queryset, term, fields):
+    """
+    Filter a queryset by a search term on several fields and rank the results.
+
+    Args:
+        queryset (QuerySet): The queryset to search.
+        term (str): The search term.
+        fields (list): The names of the text fields to search on.
+
+    Returns:
+        QuerySet: The matching records, best match first on PostgreSQL.
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': term})
+    queryset = queryset.filter(condition)
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    similarities = [TrigramWordSimilarity(term, field) for field in fields]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', 'pk')
@@ -0,0 +1,29 @@
+"""
+Signals shared by the apps.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+
+from core.cache import bump_cache_version
+
+# Sent with the queryset of the alive records that are about to be soft
+# deleted in bulk, either by SoftDeleteQuerySet.soft_delete or by its cascade.
+pre_soft_delete = Signal()
+
+# Sent with the queryset of the records restored in bulk by
+# SoftDeleteQuerySet.restore, once they are alive again.
+post_restore = Signal()
+
+
+def register_cache_invalidation_signals(model, namespace):
+    """
+    Invalidates the cache namespace of a model whenever one of its records is
+    saved, deleted, soft deleted or restored in bulk. The version is bumped once the
+    transaction commits, so no reader can cache the data being replaced.
+    """
+    def invalidate_cache(sender, **kwargs):
+        transaction.on_commit(lambda: bump_cache_version(namespace))
+
+    for signal in (post_save, post_delete, pre_soft_delete, post_restore):
+        signal.connect(invalidate_cache, sender=model, weak=False, dispatch_uid=f'cache_invalidation_{namespace}')
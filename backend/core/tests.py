@@ -1,3 +1,46 @@
+import datetime
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from yape.filters import YapeFilter
+from yape.models import Yape
+
+
+class PeriodFilterSetTests(TestCase):
+    """
+    PeriodFilterSet, through the Yape payments filter.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cashier', password='secret')
+        cls.payments = Yape.objects.bulk_create([
+            Yape(name='Ana', amount=10, date_yape=date, operation_code=str(index))
+            for index, date in enumerate([
+                datetime.date(2024, 3, 31), datetime.date(2024, 4, 1), datetime.date(2025, 4, 1),
+            ])
+        ])
+
+    def filtered(self, **params):
+        filterset = YapeFilter(params, queryset=Yape.objects.order_by('date_yape'))
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return list(filterset.qs)
+
+    def test_filters_the_date_range_of_the_period(self):
+        first, second, third = self.payments
+        self.assertEqual(self.filtered(year='2024'), [first, second])
+        self.assertEqual(self.filtered(year='2024', quarter='2'), [second])
+        self.assertEqual(self.filtered(year='2024', month='3', week='14'), [])
+        self.assertEqual(self.filtered(month='4'), [second, third])
+
+    def test_rejects_periods_that_are_not_whole_numbers(self):
+        for params in ({'year': '2024.7'}, {'month': '3.5'}, {'week': 'abc'}, {'quarter': '5'}):
+            with self.subTest(params=params):
+                self.assertFalse(YapeFilter(params, queryset=Yape.objects.all()).is_valid())
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/yape/', {'year': '2024.7'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('year', response.data)
@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.admin import TimeStampedModelAdmin
+from product.prices import today_in_peru
+from .models import DetailAssignment
+
+# core.admin registers every TimeStampedModel with the default admin
+admin.site.unregister(DetailAssignment)
+
+
+@admin.register(DetailAssignment)
+class DetailAssignmentAdmin(TimeStampedModelAdmin):
+    """Class to manage the DetailAssignment in the Django Admin"""
+    list_display = ('__str__', 'status', 'quantity', 'returned_amount', 'return_date', 'is_deleted')
+    list_filter = ('status',)
+    actions = TimeStampedModelAdmin.actions + ['close_stale_lines']
+
+    def close_stale_lines(self, request, queryset):
+        """Action to close the selected pending lines fully returned or past their return date"""
+        count = DetailAssignment.objects.filter(pk__in=queryset.values('pk')).close_stale(today_in_peru())
+        self.message_user(request, f"{count} detail assignment(s) closed.")
+
+    close_stale_lines.short_description = "Close returned or expired lines"
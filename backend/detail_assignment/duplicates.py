@@ -0,0 +1,80 @@
+"""
+Merge of the duplicated detail assignments (alive lines of the same
+assignment and product), needed before the unique constraint of the alive
+lines can be created.
+
+The functions take the models as arguments so the data migration can use
+them with the historical models.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, Min, Value, When
+from django.utils import timezone
+
+
+def duplicated_groups(detail_assignment_model):
+    """
+    Returns the (assignment_id, product_id) groups with more than one alive line.
+    """
+    return detail_assignment_model._base_manager.filter(delete_at__isnull=True).values(
+        'assignment_id', 'product_id'
+    ).annotate(lines=Count('id'), keeper_id=Min('id')).filter(lines__gt=1).order_by('assignment_id', 'product_id')
+
+
+def merge_duplicate_lines(detail_assignment_model, devolution_model, batch_size=500):
+    """
+    Merge the alive lines of each duplicated group into the oldest one, one
+    batch of groups per transaction.
+
+    The kept line gets the sum of the quantities and returned amounts (so the
+    reserved stock does not change), its status stays PENDING while any line
+    of the group is pending, the devolutions of the other lines are moved to
+    it and the other lines are soft deleted.
+
+    Returns:
+        tuple: The number of groups merged and the ids of their assignments.
+    """
+    merged, assignment_ids = 0, set()
+    lines_manager = detail_assignment_model._base_manager
+    while True:
+        with transaction.atomic():
+            groups = list(duplicated_groups(detail_assignment_model)[:batch_size])
+            if not groups:
+                break
+
+            keepers = {(group['assignment_id'], group['product_id']): group['keeper_id'] for group in groups}
+            lines = lines_manager.select_for_update().filter(
+                delete_at__isnull=True,
+                assignment_id__in={assignment_id for assignment_id, _ in keepers},
+                product_id__in={product_id for _, product_id in keepers},
+            ).order_by('id')
+
+            kept, duplicates = {}, {}
+            for line in lines:
+                keeper_id = keepers.get((line.assignment_id, line.product_id))
+                if keeper_id is None:
+                    continue
+                if line.id == keeper_id:
+                    kept[keeper_id] = line
+                    continue
+                duplicates[line.id] = keeper_id
+                keeper = kept[keeper_id]
+                keeper.quantity += line.quantity
+                keeper.returned_amount += line.returned_amount
+                if line.status == 'PENDING':
+                    keeper.status = 'PENDING'
+
+            now = timezone.now()
+            for keeper in kept.values():
+                keeper.update_at = now
+            lines_manager.bulk_update(kept.values(), ['quantity', 'returned_amount', 'status', 'update_at'])
+
+            devolution_model._base_manager.filter(detail_assignment_id__in=duplicates).update(
+                detail_assignment_id=Case(
+                    *[When(detail_assignment_id=line_id, then=Value(keeper_id)) for line_id, keeper_id in duplicates.items()]
+                )
+            )
+            lines_manager.filter(id__in=duplicates).update(delete_at=now, update_at=now)
+
+            merged += len(kept)
+            assignment_ids.update(line.assignment_id for line in kept.values())
+    return merged, assignment_ids
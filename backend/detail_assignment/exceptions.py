@@ -0,0 +1,19 @@
+class InvalidReturnedAmount(Exception):
+    """
+    Raised when returned quantities cannot be applied to detail assignments.
+
+    Attributes:
+        reasons (dict): Reason by detail assignment id of the lines that could
+            not be updated, one of the constants of this class.
+        quantities (dict): Quantity requested by detail assignment id of those lines.
+    """
+    NOT_FOUND = 'not_found'
+    GREATER_THAN_ASSIGNED = 'greater_than_assigned'
+    BEFORE_ASSIGNMENT = 'before_assignment'
+    GREATER_THAN_PENDING = 'greater_than_pending'
+    NEGATIVE = 'negative'
+
+    def __init__(self, reasons, quantities):
+        self.reasons = reasons
+        self.quantities = quantities
+        super().__init__(f'Invalid returned amount for detail assignments {sorted(reasons)}')
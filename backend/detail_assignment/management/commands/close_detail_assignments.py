@@ -0,0 +1,35 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from detail_assignment.models import DetailAssignment
+from product.prices import today_in_peru
+
+
+class Command(BaseCommand):
+    """
+    Close the pending detail assignments fully returned or past their return date.
+    """
+    help = 'Mark as FINISHED the pending detail assignments fully returned or past their return date.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Close the lines with a return date before this date '
+                                           '(YYYY-MM-DD, today in Peru by default).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Lines closed per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the lines to close.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be greater than 0.')
+        try:
+            today = datetime.date.fromisoformat(options['date']) if options['date'] else today_in_peru()
+        except ValueError:
+            raise CommandError('--date must be a date in YYYY-MM-DD format.')
+
+        if options['dry_run']:
+            lines = DetailAssignment.objects.stale(today).count()
+            self.stdout.write(f'{lines} detail assignment(s) to close.')
+            return
+
+        closed = DetailAssignment.objects.close_stale(today, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{closed} detail assignment(s) closed.'))
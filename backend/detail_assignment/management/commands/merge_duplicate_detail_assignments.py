@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from detail_assignment.duplicates import duplicated_groups, merge_duplicate_lines
+from detail_assignment.models import DetailAssignment
+from devolution.models import Devolution
+from report.models import DailySales
+
+
+class Command(BaseCommand):
+    """
+    Merge the alive detail assignments of the same assignment and product.
+    """
+    help = 'Merge duplicated detail assignments (same assignment and product) into the oldest line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Groups merged per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the duplicated groups.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be greater than 0.')
+
+        if options['dry_run']:
+            groups = duplicated_groups(DetailAssignment).count()
+            self.stdout.write(f'{groups} duplicated group(s) found.')
+            return
+
+        merged, assignment_ids = merge_duplicate_lines(DetailAssignment, Devolution, options['batch_size'])
+        # The merged lines keep the price of the oldest line, so the totals may change
+        DailySales.objects.refresh_assignments(assignment_ids)
+        self.stdout.write(self.style.SUCCESS(f'{merged} duplicated group(s) merged.'))
@@ -0,0 +1,42 @@
+from core.managers import SoftDeleteManager
+from .querysets import DetailAssignmentQuerySet
+
+
+class DetailAssignmentManager(SoftDeleteManager):
+    """
+    Manager class of the alive detail assignments.
+    """
+    queryset_class = DetailAssignmentQuerySet
+
+    def with_seller(self):
+        """
+        Returns the alive lines annotated with their assignment date and seller.
+        """
+        return self.get_queryset().with_seller()
+
+    def stale(self, today):
+        """
+        Returns the alive pending lines fully returned or past their return date.
+        """
+        return self.get_queryset().stale(today)
+
+    def close_stale(self, today, batch_size=1000):
+        """
+        Mark the alive stale pending lines as FINISHED in batches. See
+        DetailAssignmentQuerySet.close_stale.
+        """
+        return self.get_queryset().close_stale(today, batch_size)
+
+    def upsert(self, lines, update_fields=('quantity', 'unit_price')):
+        """
+        Insert the lines or update the alive lines of the same assignment and
+        product. See DetailAssignmentQuerySet.upsert.
+        """
+        return self.get_queryset().upsert(lines, update_fields)
+
+    def add_returned_amounts(self, quantities, returned_on=None):
+        """
+        Add quantities to the returned amount of the alive lines with a
+        conditional update. See DetailAssignmentQuerySet.add_returned_amounts.
+        """
+        return self.get_queryset().add_returned_amounts(quantities, returned_on)
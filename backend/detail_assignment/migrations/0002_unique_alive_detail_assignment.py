@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+from detail_assignment.duplicates import merge_duplicate_lines
+from report.rollup import daily_sales_cells
+
+
+def merge_duplicates(apps, schema_editor):
+    DetailAssignment = apps.get_model('detail_assignment', 'DetailAssignment')
+    Devolution = apps.get_model('devolution', 'Devolution')
+    Assignment = apps.get_model('assignment', 'Assignment')
+    DailySales = apps.get_model('report', 'DailySales')
+
+    _, assignment_ids = merge_duplicate_lines(DetailAssignment, Devolution)
+    if not assignment_ids:
+        return
+
+    # The merged lines keep the price of the oldest line, so the daily sales
+    # cells of the merged assignments are rebuilt
+    cells = set(Assignment.objects.filter(id__in=assignment_ids).values_list('date_assignment', 'seller_id'))
+    dates = {date for date, _ in cells}
+    seller_ids = {seller_id for _, seller_id in cells}
+
+    DailySales.objects.filter(date__in=dates, seller_id__in=seller_ids).delete()
+    DailySales.objects.bulk_create(daily_sales_cells(DailySales, DetailAssignment.objects.filter(
+        delete_at__isnull=True,
+        assignment__date_assignment__in=dates,
+        assignment__seller_id__in=seller_ids
+    )), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0001_initial'),
+        ('detail_assignment', '0001_initial'),
+        ('devolution', '0002_devolution_devolution_date_id_idx'),
+        ('product', '0007_alter_product_discount_percent'),
+        ('report', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='detailassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('delete_at__isnull', True)), fields=('assignment', 'product'), name='unique_alive_detail_assignment'),
+        ),
+    ]
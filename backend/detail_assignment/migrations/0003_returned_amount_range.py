@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+def clamp_returned_amounts(apps, schema_editor):
+    # Lines written before the constraint may be out of range
+    DetailAssignment = apps.get_model('detail_assignment', 'DetailAssignment')
+    DetailAssignment.objects.filter(returned_amount__lt=0).update(returned_amount=0)
+    DetailAssignment.objects.filter(returned_amount__gt=models.F('quantity')).update(returned_amount=models.F('quantity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detail_assignment', '0002_unique_alive_detail_assignment'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_returned_amounts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='detailassignment',
+            constraint=models.CheckConstraint(condition=models.Q(('returned_amount__gte', 0), ('returned_amount__lte', models.F('quantity'))), name='detail_assignment_returned_amount_range'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detail_assignment', '0003_returned_amount_range'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detailassignment',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['status', 'return_date'], name='detail_pending_return_idx'),
+        ),
+    ]
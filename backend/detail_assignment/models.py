@@ -1,8 +1,9 @@
 from django.db import models
 from assignment.models import Assignment
 from core.models import TimeStampedModel
+from .managers import DetailAssignmentManager
 from product.models import Product
-import datetime
+from product.prices import get_price_table
 
 # Create your models here.
 class DetailAssignment(TimeStampedModel):
@@ -23,12 +24,34 @@ class DetailAssignment(TimeStampedModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=False, blank=False)
     return_date = models.DateField(null=True, blank=True)
 
+    objects = DetailAssignmentManager()
+
     class Meta:
         """
         Meta class to define constraints and other model-level options.
         """
-        # Esta restricción debe agregarse, pero primero necesitas limpiar tus datos
-        # unique_together = ['assignment', 'product']
+        # Una sola línea viva por asignación y producto (las eliminadas no cuentan).
+        # Los duplicados existentes se fusionan con merge_duplicate_detail_assignments
+        indexes = [
+            # Líneas pendientes por fecha de devolución; las cerradas (close_detail_assignments) no entran
+            models.Index(
+                fields=['status', 'return_date'],
+                condition=models.Q(status='PENDING'),
+                name='detail_pending_return_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['assignment', 'product'],
+                condition=models.Q(delete_at__isnull=True),
+                name='unique_alive_detail_assignment',
+            ),
+            # La cantidad devuelta va de 0 a la cantidad asignada (ver DetailAssignmentQuerySet.add_returned_amounts)
+            models.CheckConstraint(
+                condition=models.Q(returned_amount__gte=0, returned_amount__lte=models.F('quantity')),
+                name='detail_assignment_returned_amount_range',
+            ),
+        ]
 
     def __str__(self):
         """
@@ -37,18 +60,25 @@ class DetailAssignment(TimeStampedModel):
         """
         return self.assignment.seller.name + ' ' + self.product.name + ' ' + f'{ self.quantity }' + ' ' + f'{ self.unit_price }'
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
         """
-        Overrides the save method to set the unit price based on the product type
-        and the current day if the unit price is not already set.
+        Keeps the values loaded from the database, so the report signals can
+        refresh the daily sales the instance belonged to before a change.
         """
-        if not self.unit_price:
-            current_day = datetime.datetime.now().strftime('%A').lower()
-            if self.product.type_product == 'PRODUCT':
-                self.unit_price = self.product.product_price
-            elif self.product.type_product == 'NEWSPAPER':
-                self.unit_price = getattr(self.product, f'{current_day}_price')
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
-        if not self.return_date:
-            self.return_date = (datetime.datetime.now() + datetime.timedelta(days=self.product.returns_date)).date()
-        super().save(*args, **kwargs)
\ No newline at end of file
+    def save(self, *args, **kwargs):
+        """
+        Overrides the save method to set the unit price of the current day and
+        the return date from the price table when they are not already set.
+        """
+        if not self.unit_price or not self.return_date:
+            prices = get_price_table([self.product_id])
+            if not self.unit_price:
+                self.unit_price = prices.unit_price(self.product_id) or 0
+            if not self.return_date:
+                self.return_date = prices.return_date(self.product_id)
+        super().save(*args, **kwargs)
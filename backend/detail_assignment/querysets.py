@@ -0,0 +1,211 @@
+from django.db import connections, transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Value, When
+from django.utils import timezone
+from core.querysets import SoftDeleteQuerySet
+from .exceptions import InvalidReturnedAmount
+
+
+class DetailAssignmentQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of detail assignments with the bulk writes used by the write paths.
+    """
+    upsert_batch_size = 500
+
+    def with_seller(self):
+        """
+        Annotate the assignment date and the seller columns read by the
+        DetailAssignmentSerializer, so they come from the same joined query
+        instead of loading the assignment and the seller of every line.
+        """
+        return self.annotate(
+            date_assignment=F('assignment__date_assignment'),
+            seller_name=F('assignment__seller__name'),
+            seller_last_name=F('assignment__seller__last_name'),
+            seller_code=F('assignment__seller__number_seller'),
+        )
+
+    def stale(self, today):
+        """
+        Filter the pending lines that can be closed: the ones fully returned
+        and the ones past their return date.
+        """
+        return self.filter(
+            Q(returned_amount__gte=F('quantity')) | Q(return_date__lt=today),
+            status='PENDING',
+        )
+
+    def close_stale(self, today, batch_size=1000):
+        """
+        Mark the stale pending lines as FINISHED (see stale) with set-based
+        UPDATEs of at most batch_size lines, one transaction per batch, so the
+        pending working set stays small without locking many rows at once.
+
+        Like upsert, it skips DetailAssignment.save and the model signals (the
+        status is not part of the daily sales).
+
+        Args:
+            today (date): Lines with a return date before this date are closed.
+            batch_size (int): Lines updated per transaction.
+
+        Returns:
+            int: The number of lines closed.
+        """
+        closed = 0
+        while True:
+            with transaction.atomic(using=self.db):
+                ids = list(self.stale(today).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    return closed
+                # The conditions are checked again in case a line changed since the SELECT
+                closed += self.stale(today).filter(pk__in=ids).update(
+                    status='FINISHED',
+                    update_at=timezone.now(),
+                )
+
+    def upsert(self, lines, update_fields=('quantity', 'unit_price')):
+        """
+        Insert the lines with INSERT ... ON CONFLICT, updating the alive line of
+        the same assignment and product when it exists, so a write is a single
+        statement instead of a lookup followed by an insert or an update.
+
+        The conflict target is the partial unique index of the alive lines,
+        which Django's bulk_create cannot target, hence the raw SQL. Like
+        bulk_create, it skips DetailAssignment.save and the model signals.
+
+        An existing line whose new quantity is above its returned amount goes
+        back to PENDING, since close_stale may have finished it.
+
+        Args:
+            lines (list): Unsaved DetailAssignment instances.
+            update_fields (tuple): Fields copied to the existing line on conflict
+                (update_at is always refreshed).
+
+        Returns:
+            list: The ids of the inserted or updated lines.
+        """
+        model = self.model
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        now = timezone.now()
+
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        updates = ', '.join(
+            f'{quote_name(column)} = EXCLUDED.{quote_name(column)}'
+            for column in [model._meta.get_field(name).column for name in (*update_fields, 'update_at')]
+        )
+        table = quote_name(model._meta.db_table)
+        assignment, product, delete_at, quantity, returned_amount, status = (
+            quote_name(model._meta.get_field(name).column)
+            for name in ('assignment', 'product', 'delete_at', 'quantity', 'returned_amount', 'status')
+        )
+        updates += (
+            f', {status} = CASE WHEN EXCLUDED.{quantity} > {table}.{returned_amount} '
+            f'THEN %s ELSE {table}.{status} END'
+        )
+        conflict = f'ON CONFLICT ({assignment}, {product}) WHERE {delete_at} IS NULL DO UPDATE SET {updates}'
+
+        ids = []
+        for start in range(0, len(lines), self.upsert_batch_size):
+            batch = lines[start:start + self.upsert_batch_size]
+            params = []
+            for line in batch:
+                line.create_at = line.create_at or now
+                line.update_at = now
+                params.extend(field.get_db_prep_save(getattr(line, field.attname), connection) for field in fields)
+            params.append('PENDING')
+
+            values = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(batch))
+            sql = (
+                f'INSERT INTO {table} ({columns}) VALUES {values} '
+                f'{conflict} RETURNING {quote_name(model._meta.pk.column)}'
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                ids.extend(row[0] for row in cursor.fetchall())
+        return ids
+
+    def add_returned_amounts(self, quantities, returned_on=None):
+        """
+        Add quantities to the returned amount of the lines with a single
+        conditional UPDATE (returned_amount = returned_amount + n WHERE
+        returned_amount + n <= quantity), so concurrent returns neither lose
+        updates nor return more than the quantity assigned, without locks.
+        Negative quantities take returns back and fail instead of leaving a
+        negative returned amount.
+
+        Either every line is updated or none of them is. Like upsert, it skips
+        DetailAssignment.save and the model signals.
+
+        Args:
+            quantities (dict): Quantity returned by detail assignment id.
+            returned_on (date, optional): Date of the return, which cannot be
+                before the date of the assignment.
+
+        Returns:
+            int: The number of lines updated.
+
+        Raises:
+            InvalidReturnedAmount: If a line does not exist or cannot take the
+                quantity.
+        """
+        from assignment.models import Assignment
+
+        quantities = {pk: quantity for pk, quantity in quantities.items() if quantity}
+        if not quantities:
+            return 0
+
+        delta = Case(
+            *[When(pk=pk, then=Value(quantity)) for pk, quantity in quantities.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        condition = Q()
+        for pk, quantity in quantities.items():
+            if quantity > 0:
+                condition |= Q(pk=pk, quantity__gte=F('returned_amount') + quantity)
+            else:
+                condition |= Q(pk=pk, returned_amount__gte=-quantity)
+
+        queryset = self.filter(condition)
+        if returned_on is not None:
+            # A subquery instead of a join, so the conditions stay on the updated rows
+            queryset = queryset.filter(Exists(Assignment.all_objects.filter(
+                pk=OuterRef('assignment_id'), date_assignment__lte=returned_on
+            )))
+
+        with transaction.atomic(using=self.db):
+            updated = queryset.update(
+                returned_amount=F('returned_amount') + delta,
+                update_at=timezone.now(),
+            )
+            if updated != len(quantities):
+                transaction.set_rollback(True, using=self.db)
+
+        if updated == len(quantities):
+            return updated
+
+        lines = {
+            pk: (quantity, returned_amount, date_assignment)
+            for pk, quantity, returned_amount, date_assignment in self.filter(pk__in=quantities).values_list(
+                'pk', 'quantity', 'returned_amount', 'assignment__date_assignment'
+            )
+        }
+        reasons = {}
+        for pk, quantity in quantities.items():
+            if pk not in lines:
+                reasons[pk] = InvalidReturnedAmount.NOT_FOUND
+            elif quantity > lines[pk][0]:
+                reasons[pk] = InvalidReturnedAmount.GREATER_THAN_ASSIGNED
+            elif returned_on is not None and returned_on < lines[pk][2]:
+                reasons[pk] = InvalidReturnedAmount.BEFORE_ASSIGNMENT
+            elif lines[pk][1] + quantity > lines[pk][0]:
+                reasons[pk] = InvalidReturnedAmount.GREATER_THAN_PENDING
+            elif lines[pk][1] + quantity < 0:
+                reasons[pk] = InvalidReturnedAmount.NEGATIVE
+        # The lines may have changed since the UPDATE
+        reasons = reasons or {
+            pk: InvalidReturnedAmount.GREATER_THAN_PENDING if quantity > 0 else InvalidReturnedAmount.NEGATIVE
+            for pk, quantity in quantities.items()
+        }
+        raise InvalidReturnedAmount(reasons, {pk: quantities[pk] for pk in reasons})
@@ -1,9 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
 from product.models import Product
+from product.prices import get_price_table
 from product.serializer import ProductSerializer
 from assignment.models import Assignment
+from report.models import DailySales
 from .models import DetailAssignment
-import datetime
 
 class DetailAssignmentSerializer(serializers.ModelSerializer):
     """
@@ -49,9 +51,33 @@ class DetailAssignmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor que 0.")
         return value
 
+    def validate(self, attrs):
+        """
+        Validate that the returned amount is between 0 and the quantity, as
+        required by the check constraint of the model.
+
+        Args:
+            attrs (dict): The attributes to validate.
+
+        Returns:
+            dict: The validated attributes.
+
+        Raises:
+            serializers.ValidationError: If the returned amount is negative or
+                greater than the quantity.
+        """
+        quantity = attrs.get('quantity', self.instance.quantity if self.instance else 0)
+        returned_amount = attrs.get('returned_amount', self.instance.returned_amount if self.instance else 0)
+        if returned_amount < 0 or returned_amount > quantity:
+            raise serializers.ValidationError(
+                {'returned_amount': "La cantidad devuelta no puede ser negativa ni mayor que la cantidad."}
+            )
+        return attrs
+
     def get_date_assignment(self, obj):
         """
-        Get the date_assignment from the related Assignment.
+        Get the date_assignment from the related Assignment, or from the
+        annotation of DetailAssignment.objects.with_seller() when present.
 
         Args:
             obj: The object instance.
@@ -59,6 +85,8 @@ class DetailAssignmentSerializer(serializers.ModelSerializer):
         Returns:
             date: The date_assignment of the related Assignment.
         """
+        if hasattr(obj, 'date_assignment'):
+            return obj.date_assignment
         return obj.assignment.date_assignment
 
     def get_seller_name(self, obj):
@@ -71,6 +99,8 @@ class DetailAssignmentSerializer(serializers.ModelSerializer):
         Returns:
             str: The seller's name.
         """
+        if hasattr(obj, 'seller_name'):
+            return obj.seller_name
         return obj.assignment.seller.name
 
     def get_seller_last_name(self, obj):
@@ -83,6 +113,8 @@ class DetailAssignmentSerializer(serializers.ModelSerializer):
         Returns:
             str: The seller's last name.
         """
+        if hasattr(obj, 'seller_last_name'):
+            return obj.seller_last_name
         return obj.assignment.seller.last_name
 
     def get_seller_code(self, obj):
@@ -95,36 +127,35 @@ class DetailAssignmentSerializer(serializers.ModelSerializer):
         Returns:
             str: The seller's code.
         """
+        if hasattr(obj, 'seller_code'):
+            return obj.seller_code
         return obj.assignment.seller.number_seller
 
     def create(self, validated_data):
         """
-        Create a new DetailAssignment instance.
+        Create a new DetailAssignment instance, or update the quantity and price
+        of the alive line of the same assignment and product.
 
         Args:
             validated_data (dict): Validated data for creating the instance.
 
         Returns:
-            DetailAssignment: The created DetailAssignment instance.
+            DetailAssignment: The created or updated DetailAssignment instance.
         """
         assignment = validated_data.pop('assignment')
         product = validated_data.pop('product')
 
-        unit_price = product.product_price
-
-        detail_assignment, created = DetailAssignment.objects.get_or_create(
+        # A single INSERT ... ON CONFLICT: an existing line of the same
+        # assignment and product gets the new quantity and price
+        prices = get_price_table([product.id])
+        detail_assignment_id, = DetailAssignment.objects.upsert([DetailAssignment(
             assignment=assignment,
             product=product,
-            defaults={
-                'unit_price': unit_price,
-                **validated_data
-            }
-        )
-
-        if created and not detail_assignment.return_date:
-            detail_assignment.return_date = (
-                datetime.datetime.now().date() + datetime.timedelta(days=product.returns_date)
-            )
-            detail_assignment.save()
-
-        return detail_assignment
\ No newline at end of file
+            unit_price=prices.unit_price(product.id) or 0,
+            return_date=prices.return_date(product.id),
+            **validated_data
+        )])
+
+        # The upsert does not send the signals that keep the daily sales in sync
+        transaction.on_commit(lambda: DailySales.objects.refresh_assignments({assignment.id}, {product.id}))
+        return DetailAssignment.objects.get(pk=detail_assignment_id)
@@ -1,3 +1,214 @@
+import datetime
+import math
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from assignment.models import Assignment
+from detail_assignment.duplicates import duplicated_groups, merge_duplicate_lines
+from detail_assignment.models import DetailAssignment
+from devolution.models import Devolution
+from product.models import Product
+from report.models import DailySales
+from seller.models import Seller
+from type_product.models import TypeProduct
+
+
+class DetailAssignmentTestCase(TestCase):
+    """
+    Sellers, products and assignments shared by the detail assignment tests.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date(2026, 10, 19)
+        cls.type_product = TypeProduct.objects.create(
+            name='PRODUCTO', type='PRODUCT', monday_price=1, tuesday_price=1, wednesday_price=1,
+            thursday_price=1, friday_price=1, saturday_price=1, sunday_price=1
+        )
+        cls.product = Product.objects.create(
+            name='Libro', type_product=cls.type_product, base_price=10, total_quantity=1000, returns_date=3
+        )
+        cls.seller = Seller.objects.create(
+            name='Ana', last_name='Quispe', number_seller='CAN-1001', dni='10000001', status=True
+        )
+        cls.assignment = Assignment.objects.create(seller=cls.seller, date_assignment=cls.today)
+
+    def line(self, quantity, **kwargs):
+        """
+        Returns an unsaved line of the shared assignment and product.
+        """
+        return DetailAssignment(
+            assignment=self.assignment, product=self.product, quantity=quantity, unit_price=10, **kwargs
+        )
+
+
+class UpsertTests(DetailAssignmentTestCase):
+    """
+    DetailAssignment.objects.upsert (INSERT ... ON CONFLICT on the alive lines).
+    """
+
+    def test_inserts_a_new_line(self):
+        ids = DetailAssignment.objects.upsert([self.line(5)])
+
+        line = DetailAssignment.objects.get()
+        self.assertEqual(ids, [line.id])
+        self.assertEqual((line.quantity, line.unit_price, line.status), (5, 10, 'PENDING'))
+
+    def test_updates_the_alive_line_of_the_same_assignment_and_product(self):
+        first_id, = DetailAssignment.objects.upsert([self.line(5)])
+        DetailAssignment.objects.filter(pk=first_id).update(returned_amount=2)
+
+        second_id, = DetailAssignment.objects.upsert([self.line(8)])
+
+        self.assertEqual(second_id, first_id)
+        line = DetailAssignment.all_objects.get()
+        self.assertEqual((line.quantity, line.returned_amount), (8, 2))
+
+    def test_inserts_a_new_line_after_a_soft_delete(self):
+        first_id, = DetailAssignment.objects.upsert([self.line(5)])
+        DetailAssignment.objects.filter(pk=first_id).soft_delete()
+
+        second_id, = DetailAssignment.objects.upsert([self.line(3)])
+
+        self.assertNotEqual(second_id, first_id)
+        self.assertEqual(DetailAssignment.all_objects.count(), 2)
+        self.assertEqual(DetailAssignment.objects.get().quantity, 3)
+
+    def test_reopens_a_finished_line_that_gets_more_units(self):
+        line_id, = DetailAssignment.objects.upsert([self.line(5)])
+        DetailAssignment.objects.filter(pk=line_id).update(returned_amount=5, status='FINISHED')
+
+        DetailAssignment.objects.upsert([self.line(5)])
+        self.assertEqual(DetailAssignment.objects.get().status, 'FINISHED')
+
+        DetailAssignment.objects.upsert([self.line(7)])
+        self.assertEqual(DetailAssignment.objects.get().status, 'PENDING')
+
+
+class MergeDuplicateLinesTests(DetailAssignmentTestCase):
+    """
+    merge_duplicate_lines, run by the detail_assignment.0002 migration.
+    """
+
+    def setUp(self):
+        # The duplicates predate the unique constraint of the alive lines
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name("unique_alive_detail_assignment")}')
+
+    def test_merges_the_alive_lines_of_a_group_into_the_oldest_one(self):
+        keeper, finished, pending = DetailAssignment.objects.bulk_create([
+            self.line(10, returned_amount=2, status='FINISHED'),
+            self.line(5, returned_amount=1, status='FINISHED'),
+            self.line(3, returned_amount=0, status='PENDING'),
+        ])
+        deleted = self.line(4)
+        deleted.save()
+        DetailAssignment.objects.filter(pk=deleted.pk).soft_delete()
+        devolution = Devolution.objects.create(detail_assignment=finished, quantity=1, devolution_date=self.today)
+
+        merged, assignment_ids = merge_duplicate_lines(DetailAssignment, Devolution, batch_size=1)
+
+        self.assertEqual((merged, assignment_ids), (1, {self.assignment.id}))
+        self.assertFalse(duplicated_groups(DetailAssignment).exists())
+        keeper.refresh_from_db()
+        self.assertEqual((keeper.quantity, keeper.returned_amount, keeper.status), (18, 3, 'PENDING'))
+        self.assertEqual(list(DetailAssignment.objects.values_list('id', flat=True)), [keeper.id])
+        self.assertEqual(DetailAssignment.all_objects.filter(id__in=[finished.id, pending.id, deleted.id],
+                                                             delete_at__isnull=False).count(), 3)
+        devolution.refresh_from_db()
+        self.assertEqual(devolution.detail_assignment_id, keeper.id)
+
+
+class BulkDispatchTests(DetailAssignmentTestCase):
+    """
+    The bulk-dispatch action: one stock reservation and one upsert for every line.
+    """
+    url = '/api/v1/detail-assignments/bulk-dispatch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user('dispatcher', password='secret')
+        cls.short_product = Product.objects.create(
+            name='Revista', type_product=cls.type_product, base_price=5, total_quantity=4, returns_date=1
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def dispatch(self, lines):
+        return self.client.post(self.url, {'date': str(self.today), 'lines': lines}, format='json')
+
+    def test_a_short_product_writes_nothing(self):
+        response = self.dispatch([
+            {'assignment_id': self.assignment.id, 'product_id': self.product.id, 'quantity': 10},
+            {'assignment_id': self.assignment.id, 'product_id': self.short_product.id, 'quantity': 6},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['products'], [
+            {'product_id': self.short_product.id, 'available': 4, 'requested': 6},
+        ])
+        self.assertFalse(DetailAssignment.all_objects.exists())
+        self.assertEqual(
+            list(Product.objects.filter(id__in=[self.product.id, self.short_product.id]).values_list(
+                'reserved_quantity', flat=True
+            )),
+            [0, 0]
+        )
+
+    def test_the_number_of_queries_does_not_grow_with_the_lines(self):
+        products = Product.objects.bulk_create([
+            Product(name=f'Producto {index}', type_product=self.type_product, base_price=1, total_quantity=1000)
+            for index in range(100)
+        ])
+        sellers = Seller.objects.bulk_create([
+            Seller(name=f'Vendedor {index}', last_name='Mamani', number_seller=f'CAN-{2000 + index}',
+                   dni=f'{20000000 + index}', status=True)
+            for index in range(21)
+        ])
+        assignments = Assignment.objects.bulk_create([
+            Assignment(seller=seller, date_assignment=self.today) for seller in sellers
+        ])
+
+        small = [
+            {'assignment_id': assignments[0].id, 'product_id': product.id, 'quantity': 1}
+            for product in products[:10]
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.dispatch(small)
+        self.assertEqual(response.data['created'], 10)
+
+        large = [
+            {'assignment_id': assignment.id, 'product_id': product.id, 'quantity': 1}
+            for assignment in assignments[1:]
+            for product in products
+        ]
+        # Only the INSERT ... ON CONFLICT statements grow, one per batch of lines
+        upsert_batch_size = DetailAssignment.objects.get_queryset().upsert_batch_size
+        upsert_batches = math.ceil(len(large) / upsert_batch_size)
+        with self.assertNumQueries(len(queries) + upsert_batches - 1):
+            response = self.dispatch(large)
+        self.assertEqual(response.data['created'], 2000)
+        self.assertEqual(Product.objects.get(pk=products[0].pk).reserved_quantity, 21)
+
+    def test_refreshes_the_daily_sales_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.dispatch([
+                {'assignment_id': self.assignment.id, 'product_id': self.product.id, 'quantity': 10},
+                {'seller_id': self.seller.id, 'product_id': self.short_product.id, 'quantity': 4},
+            ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(callbacks)
+        self.assertEqual(
+            sorted(DailySales.objects.values_list('date', 'seller_id', 'product_id', 'quantity', 'assigned_total')),
+            [
+                (self.today, self.seller.id, self.product.id, 10, 100),
+                (self.today, self.seller.id, self.short_product.id, 4, 20),
+            ]
+        )
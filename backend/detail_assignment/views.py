@@ -2,16 +2,24 @@ from rest_framework import viewsets
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Prefetch, Sum
+from django.shortcuts import get_object_or_404
+from collections import defaultdict
 
-from core.pagination import CustomPagination
+from assignment.models import Assignment
+from core.pagination import OptionalKeysetPagination
 from detail_assignment.models import DetailAssignment
 from detail_assignment.serializer import DetailAssignmentSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 import datetime
 
+from product.exceptions import InsufficientStock
 from product.models import Product
+from product.prices import get_price_table, today_in_peru
+from report.models import DailySales
+from seller.models import Seller
 
 
 # Create your views here.
@@ -24,9 +32,17 @@ class DetailAssignmentViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    queryset = DetailAssignment.objects.all()
+    queryset = DetailAssignment.objects.with_seller().prefetch_related(
+        Prefetch('product', queryset=Product.objects.for_serializer())
+    )
     serializer_class = DetailAssignmentSerializer
-    pagination_class = CustomPagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-id',)
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'list': {'queries': 4},
+        'retrieve': {'queries': 3},
+    }
 
     def calculate_sub_total(self, detail_assignment):
         """
@@ -58,47 +74,39 @@ class DetailAssignmentViewSet(viewsets.ModelViewSet):
 
         try:
             product = Product.objects.get(id=product_id)
-            data['unit_price'] = product.product_price
         except Product.DoesNotExist:
             return Response({'error': 'Product matching query does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validate stock availability
-        if quantity_requested > product.available_stock:
-            return Response({
-                'error': f'Insufficient stock. Available: {product.available_stock}, Requested: {quantity_requested}'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
 
-        detail_assignments = DetailAssignment.objects.filter(
-            assignment_id=assignment_id,
-            product_id=product_id
-        )
+        with transaction.atomic():
+            # Lock the assignment so concurrent writes to its lines compute the difference on the current quantity
+            Assignment.objects.select_for_update().get(pk=serializer.validated_data['assignment'].pk)
+            old_quantity, returned_amount = DetailAssignment.objects.filter(
+                assignment_id=assignment_id,
+                product_id=product_id
+            ).values_list('quantity', 'returned_amount').first() or (None, 0)
+            if quantity_requested < returned_amount:
+                return Response({'error': f'Quantity cannot be less than the returned amount: {returned_amount}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            quantity_difference = quantity_requested - (old_quantity or 0)
+            requested_label = 'Requested' if old_quantity is None else 'Requested difference'
 
-        if detail_assignments.exists():
-            detail_assignment = detail_assignments.first()
-            old_quantity = detail_assignment.quantity
-            # Validate stock for the difference
-            quantity_difference = quantity_requested - old_quantity
-            if quantity_difference > product.available_stock:
+            # Reserve the stock with a conditional update that fails if it is not available
+            try:
+                Product.objects.reserve_stock({product.id: quantity_difference})
+            except InsufficientStock as error:
                 return Response({
-                    'error': f'Insufficient stock. Available: {product.available_stock}, Requested difference: {quantity_difference}'
+                    'error': f'Insufficient stock. Available: {error.available[product.id]}, {requested_label}: {quantity_difference}'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            
-            detail_assignment.quantity = quantity_requested
-            detail_assignment.unit_price = data['unit_price']
-            detail_assignment.save()
-            
-            # Update reserved stock
-            product.reserved_quantity += quantity_difference
-            product.save()
-        else:
-            serializer = self.get_serializer(data=data)
-            serializer.is_valid(raise_exception=True)
+
+            # Inserts the line or updates the existing one (see DetailAssignmentSerializer.create)
             detail_assignment = serializer.save()
-            
-            # Reserve the stock
-            product.reserved_quantity += quantity_requested
-            product.save()
 
+        # Reload the line so the nested product shows the reserved stock
+        detail_assignment = self.get_queryset().get(pk=detail_assignment.pk)
         serializer = self.get_serializer(detail_assignment)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -114,12 +122,16 @@ class DetailAssignmentViewSet(viewsets.ModelViewSet):
             Response: The response object with no content.
         """
         instance = self.get_object()
-        # Release the reserved stock
-        product = instance.product
-        product.reserved_quantity -= instance.quantity
-        product.save()
-        
-        instance.soft_delete()
+        with transaction.atomic():
+            # Lock the line so concurrent deletes do not release its stock twice
+            instance = get_object_or_404(DetailAssignment.objects.select_for_update(), pk=instance.pk)
+            # Release the reserved stock. Releasing only fails when the
+            # product is no longer alive, and then there is no stock to give back
+            try:
+                Product.objects.reserve_stock({instance.product_id: -instance.quantity})
+            except InsufficientStock:
+                pass
+            instance.soft_delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['get'], url_path='calculate-sub-total')
@@ -143,4 +155,182 @@ class DetailAssignmentViewSet(viewsets.ModelViewSet):
             'quantity': detail_assignment.quantity,
             'unit_price': detail_assignment.unit_price,
             'sub_total': sub_total
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+    def parse_dispatch_lines(self, data):
+        """
+        Parse the body of the bulk dispatch action.
+
+        Args:
+            data: A list of lines, or a dict with a `lines` list and an optional `date`.
+
+        Returns:
+            tuple: The assignment date, the parsed lines as (assignment_id,
+                seller_id, product_id, quantity) tuples and the indexes of the
+                invalid lines.
+        """
+        date = None
+        lines = data
+        if isinstance(data, dict):
+            lines = data.get('lines', [])
+            date = data.get('date')
+
+        if date:
+            date = datetime.date.fromisoformat(date)
+        else:
+            date = today_in_peru()
+
+        parsed, invalid = [], []
+        for index, line in enumerate(lines if isinstance(lines, list) else []):
+            try:
+                assignment_id = line.get('assignment_id')
+                seller_id = line.get('seller_id')
+                parsed_line = (
+                    int(assignment_id) if assignment_id is not None else None,
+                    int(seller_id) if seller_id is not None else None,
+                    int(line['product_id']),
+                    int(line['quantity']),
+                )
+            except (AttributeError, KeyError, TypeError, ValueError):
+                invalid.append(index)
+                continue
+            # Each line goes either to an assignment or to a seller, with a positive quantity
+            if (parsed_line[0] is None) == (parsed_line[1] is None) or parsed_line[3] <= 0:
+                invalid.append(index)
+                continue
+            parsed.append(parsed_line)
+
+        return date, parsed, invalid
+
+    @action(detail=False, methods=['post'], url_path='bulk-dispatch')
+    def bulk_dispatch(self, request):
+        """
+        Create or update the detail assignments of many sellers and products at once.
+
+        Each line has a `product_id`, a `quantity` and either an `assignment_id`
+        or a `seller_id`. Lines given by seller go to the seller's assignment of
+        `date` (today by default), which is created when missing. The quantity
+        replaces the quantity of an existing line, as in `create`, and the
+        lines are priced for the date of their assignment.
+
+        The stock of every product is validated and reserved with a single
+        conditional update and the lines are written with a single upsert, all
+        in one transaction, so the number of queries does not grow with the number
+        of lines.
+
+        Args:
+            request (Request): The request object containing the lines.
+
+        Returns:
+            Response: The number of lines created and updated and the assignments touched.
+        """
+        try:
+            date, lines, invalid = self.parse_dispatch_lines(request.data)
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid date, use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if invalid:
+            return Response({'error': f'Invalid lines: {invalid}'}, status=status.HTTP_400_BAD_REQUEST)
+        if not lines:
+            return Response({'error': 'At least one line is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        product_ids = {line[2] for line in lines}
+        missing_product_ids = product_ids - set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        if missing_product_ids:
+            return Response({'error': f'Products not found: {sorted(missing_product_ids)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        assignment_ids = {line[0] for line in lines if line[0] is not None}
+        missing_assignment_ids = assignment_ids - set(
+            Assignment.objects.filter(id__in=assignment_ids).values_list('id', flat=True)
+        )
+        if missing_assignment_ids:
+            return Response({'error': f'Assignments not found: {sorted(missing_assignment_ids)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        seller_ids = {line[1] for line in lines if line[1] is not None}
+        missing_seller_ids = seller_ids - set(Seller.objects.filter(id__in=seller_ids).values_list('id', flat=True))
+        if missing_seller_ids:
+            return Response({'error': f'Sellers not found: {sorted(missing_seller_ids)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            seller_assignments = dict(Assignment.objects.filter(
+                date_assignment=date,
+                seller_id__in=seller_ids
+            ).values_list('seller_id', 'id'))
+            created_assignments = Assignment.objects.bulk_create([
+                Assignment(date_assignment=date, seller_id=seller_id)
+                for seller_id in seller_ids
+                if seller_id not in seller_assignments
+            ])
+            seller_assignments.update({assignment.seller_id: assignment.id for assignment in created_assignments})
+
+            quantities = {}
+            for assignment_id, seller_id, product_id, quantity in lines:
+                key = (assignment_id or seller_assignments[seller_id], product_id)
+                if key in quantities:
+                    transaction.set_rollback(True)
+                    return Response({'error': f'Duplicated line for assignment {key[0]} and product {key[1]}'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                quantities[key] = quantity
+            assignment_ids = {assignment_id for assignment_id, _ in quantities}
+
+            # Lock the assignments so concurrent writes to their lines compute the differences on the current quantities
+            assignment_dates = dict(Assignment.objects.select_for_update().filter(
+                id__in=assignment_ids
+            ).order_by('id').values_list('id', 'date_assignment'))
+            existing, returned = {}, {}
+            for assignment_id, product_id, quantity, returned_amount in DetailAssignment.objects.filter(
+                assignment_id__in=assignment_ids,
+                product_id__in=product_ids
+            ).values_list('assignment_id', 'product_id', 'quantity', 'returned_amount'):
+                existing[(assignment_id, product_id)] = quantity
+                returned[(assignment_id, product_id)] = returned_amount
+
+            below_returned = sorted(key for key, quantity in quantities.items() if quantity < returned.get(key, 0))
+            if below_returned:
+                transaction.set_rollback(True)
+                return Response({
+                    'error': 'Quantity cannot be less than the returned amount for (assignment, product): '
+                             f'{below_returned}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            differences = defaultdict(int)
+            for key, quantity in quantities.items():
+                differences[key[1]] += quantity - existing.get(key, 0)
+
+            # One conditional update reserves the stock of every product, or none of them
+            try:
+                Product.objects.reserve_stock(differences)
+            except InsufficientStock as error:
+                transaction.set_rollback(True)
+                return Response({
+                    'error': f'Insufficient stock for products: {sorted(error.available)}',
+                    'products': [
+                        {'product_id': product_id, 'available': available, 'requested': error.requested[product_id]}
+                        for product_id, available in error.available.items()
+                    ]
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # A single INSERT ... ON CONFLICT writes the new lines and updates the existing ones
+            prices = get_price_table(product_ids)
+            DetailAssignment.objects.upsert([
+                DetailAssignment(
+                    assignment_id=assignment_id,
+                    product_id=product_id,
+                    quantity=quantity,
+                    unit_price=prices.unit_price(product_id, assignment_dates[assignment_id]) or 0,
+                    return_date=prices.return_date(product_id, assignment_dates[assignment_id]),
+                )
+                for (assignment_id, product_id), quantity in quantities.items()
+            ])
+
+            # The upsert does not send the signals that keep the daily sales in sync
+            transaction.on_commit(lambda: DailySales.objects.refresh_assignments(assignment_ids, product_ids))
+
+        updated = len(existing.keys() & quantities.keys())
+        return Response({
+            'created': len(quantities) - updated,
+            'updated': updated,
+            'assignments': sorted(assignment_ids),
+        }, status=status.HTTP_201_CREATED)
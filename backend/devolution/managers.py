@@ -0,0 +1,15 @@
+from core.managers import SoftDeleteManager
+from .querysets import DevolutionQuerySet
+
+
+class DevolutionManager(SoftDeleteManager):
+    """
+    Manager class of the alive devolutions.
+    """
+    queryset_class = DevolutionQuerySet
+
+    def for_serializer(self):
+        """
+        Returns the alive devolutions with everything the DevolutionSerializer reads.
+        """
+        return self.get_queryset().for_serializer()
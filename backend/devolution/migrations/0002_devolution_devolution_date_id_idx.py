@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detail_assignment', '0001_initial'),
+        ('devolution', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='devolution',
+            index=models.Index(fields=['devolution_date', 'id'], name='devolution_date_id_idx'),
+        ),
+    ]
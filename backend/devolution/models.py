@@ -1,6 +1,7 @@
 from django.db import models
 from core.models import TimeStampedModel
 from detail_assignment.models import DetailAssignment
+from .managers import DevolutionManager
 
 
 # Create your models here.
@@ -10,5 +11,13 @@ class Devolution(TimeStampedModel):
 
     detail_assignment = models.ForeignKey(DetailAssignment, on_delete=models.CASCADE, null=False, blank=False)
 
+    objects = DevolutionManager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of DevolutionViewSet
+            models.Index(fields=['devolution_date', 'id'], name='devolution_date_id_idx'),
+        ]
+
     def __str__(self):
         return self.detail_assignment.assignment.seller.name + ' ' + f'{ self.devolution_date }' + ' ' + f'{ self.quantity }' + ' ' + f'{self.detail_assignment.quantity}'
\ No newline at end of file
@@ -0,0 +1,26 @@
+from core.querysets import SoftDeleteQuerySet
+from product.querysets import assignment_totals
+
+
+class DevolutionQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of devolutions with the joins used by the DevolutionSerializer.
+    """
+
+    def for_serializer(self):
+        """
+        Join the detail assignment, its assignment and seller and its product
+        and type of product, and annotate the product aggregates read by the
+        ProductSerializer, so a page of devolutions is a single query.
+
+        The aggregates are annotated as `product_assigned_quantity` and
+        `product_returned_quantity` and moved to the product by the
+        DevolutionSerializer.
+        """
+        return self.select_related(
+            'detail_assignment__assignment__seller',
+            'detail_assignment__product__type_product',
+        ).annotate(**{
+            f'product_{name}': expression
+            for name, expression in assignment_totals('detail_assignment__product').items()
+        })
@@ -1,9 +1,21 @@
+from collections import defaultdict
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from detail_assignment.exceptions import InvalidReturnedAmount
 from detail_assignment.models import DetailAssignment
 from detail_assignment.serializer import DetailAssignmentSerializer
+from report.models import DailySales
 from .models import Devolution
 
+RETURNED_AMOUNT_ERRORS = {
+    InvalidReturnedAmount.NOT_FOUND: 'The Detail Assignment does not exist.',
+    InvalidReturnedAmount.GREATER_THAN_ASSIGNED: 'The quantity returned is greater than the quantity assigned.',
+    InvalidReturnedAmount.BEFORE_ASSIGNMENT: 'The devolution date is less than the assignment date.',
+    InvalidReturnedAmount.GREATER_THAN_PENDING: 'The quantity returned is greater than the quantity assigned.',
+    InvalidReturnedAmount.NEGATIVE: 'The quantity returned cannot be negative.',
+}
+
 class DevolutionSerializer(serializers.HyperlinkedModelSerializer):
     detail_assignment = DetailAssignmentSerializer(read_only=True)
     detail_assignment_id = serializers.PrimaryKeyRelatedField(
@@ -14,39 +26,64 @@ class DevolutionSerializer(serializers.HyperlinkedModelSerializer):
         model = Devolution
         fields = ['id', 'detail_assignment_id', 'detail_assignment', 'devolution_date', 'quantity']
 
+    def to_representation(self, instance):
+        """
+        Move the product aggregates annotated by Devolution.objects.for_serializer()
+        to the product, where the ProductSerializer reads them.
+        """
+        if hasattr(instance, 'product_assigned_quantity'):
+            product = instance.detail_assignment.product
+            product.assigned_quantity = instance.product_assigned_quantity
+            product.returned_quantity = instance.product_returned_quantity
+        return super().to_representation(instance)
+
     def create(self, validated_data):
         detail_assignment = validated_data.pop('detail_assignment_id')
-        devolution = Devolution.objects.create(detail_assignment=detail_assignment, **validated_data)
-        detail_assignment.returned_amount += devolution.quantity
-        detail_assignment.save()
+        quantity = validated_data.get('quantity', 0)
+        with transaction.atomic():
+            # Conditional update: fails instead of returning more than the quantity assigned
+            try:
+                DetailAssignment.objects.add_returned_amounts({detail_assignment.id: quantity})
+            except InvalidReturnedAmount as error:
+                raise ValidationError({'quantity': RETURNED_AMOUNT_ERRORS[error.reasons[detail_assignment.id]]})
+            devolution = Devolution.objects.create(detail_assignment=detail_assignment, **validated_data)
         return devolution
 
     def update(self, instance, validated_data):
         detail_assignment_id = validated_data.pop('detail_assignment_id', None)
-        if detail_assignment_id:
-            if isinstance(detail_assignment_id, DetailAssignment):
-                detail_assignment_id = detail_assignment_id.id
+        if isinstance(detail_assignment_id, DetailAssignment):
+            detail_assignment_id = detail_assignment_id.id
+        old_detail_assignment_id = instance.detail_assignment_id
+        new_detail_assignment_id = detail_assignment_id or old_detail_assignment_id
+        old_quantity = instance.quantity
+        new_quantity = validated_data.get('quantity', old_quantity)
+
+        # Take the old quantity back from the old line and return the new one to the new line
+        quantities = defaultdict(int)
+        quantities[old_detail_assignment_id] -= old_quantity
+        quantities[new_detail_assignment_id] += new_quantity
+
+        with transaction.atomic():
             try:
-                detail_assignment = DetailAssignment.objects.get(id=detail_assignment_id)
-                instance.detail_assignment = detail_assignment
-            except DetailAssignment.DoesNotExist:
-                raise ValidationError({'detail_assignment_id': 'The Detail Assignment does not exist.'})
-
-        # Update returned amount
-        if 'quantity' in validated_data:
-            old_quantity = instance.quantity
-            new_quantity = validated_data['quantity']
-            total_returned = instance.detail_assignment.returned_amount - old_quantity + new_quantity
-
-            if total_returned > instance.detail_assignment.quantity:
-                raise ValidationError({'quantity': 'The quantity returned is greater than the quantity assigned.'})
-            if total_returned < 0:
-                raise ValidationError({'quantity': 'The quantity returned cannot be negative.'})
-
-            instance.detail_assignment.returned_amount = total_returned
-            instance.detail_assignment.save()
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        return instance
\ No newline at end of file
+                DetailAssignment.objects.add_returned_amounts(quantities)
+            except InvalidReturnedAmount as error:
+                if error.reasons.get(new_detail_assignment_id) == InvalidReturnedAmount.NOT_FOUND:
+                    raise ValidationError({'detail_assignment_id': 'The Detail Assignment does not exist.'})
+                reason = error.reasons.get(new_detail_assignment_id) or next(iter(error.reasons.values()))
+                raise ValidationError({'quantity': RETURNED_AMOUNT_ERRORS[reason]})
+
+            instance.detail_assignment_id = new_detail_assignment_id
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if new_detail_assignment_id != old_detail_assignment_id:
+                # The devolution signals only refresh the daily sales of the new line
+                old_detail_assignment = DetailAssignment.all_objects.filter(pk=old_detail_assignment_id).values(
+                    'assignment_id', 'product_id'
+                ).first()
+                if old_detail_assignment:
+                    transaction.on_commit(lambda: DailySales.objects.refresh_assignments(
+                        [old_detail_assignment['assignment_id']], [old_detail_assignment['product_id']]
+                    ))
+        return instance
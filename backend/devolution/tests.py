@@ -1,3 +1,188 @@
+import datetime
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from assignment.models import Assignment
+from detail_assignment.exceptions import InvalidReturnedAmount
+from detail_assignment.models import DetailAssignment
+from devolution.models import Devolution
+from product.models import Product
+from product.prices import today_in_peru
+from seller.models import Seller
+from type_product.models import TypeProduct
+
+
+class ReturnedAmountTestCase(TestCase):
+    """
+    Two lines of 10 units (with 2 and 0 returned) of an assignment of today.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = today_in_peru()
+        type_product = TypeProduct.objects.create(name='PRODUCTO', type='PRODUCT')
+        book = Product.objects.create(name='Libro', type_product=type_product, base_price=10, total_quantity=100)
+        magazine = Product.objects.create(name='Revista', type_product=type_product, base_price=5, total_quantity=100)
+        seller = Seller.objects.create(
+            name='Ana', last_name='Quispe', number_seller='CAN-1001', dni='10000001', status=True
+        )
+        cls.assignment = Assignment.objects.create(seller=seller, date_assignment=cls.today)
+        cls.line, cls.other_line = DetailAssignment.objects.bulk_create([
+            DetailAssignment(assignment=cls.assignment, product=book, quantity=10, returned_amount=2, unit_price=10),
+            DetailAssignment(assignment=cls.assignment, product=magazine, quantity=10, returned_amount=0, unit_price=5),
+        ])
+
+    def returned(self):
+        return dict(DetailAssignment.objects.values_list('id', 'returned_amount'))
+
+
+class AddReturnedAmountsTests(ReturnedAmountTestCase):
+    """
+    DetailAssignment.objects.add_returned_amounts: one conditional UPDATE for every line.
+    """
+
+    def assertInvalid(self, quantities, reasons, **kwargs):
+        with self.assertRaises(InvalidReturnedAmount) as context:
+            DetailAssignment.objects.add_returned_amounts(quantities, **kwargs)
+        self.assertEqual(context.exception.reasons, reasons)
+        self.assertEqual(context.exception.quantities, {pk: quantities[pk] for pk in reasons})
+
+    def test_adds_and_takes_back_returned_amounts(self):
+        updated = DetailAssignment.objects.add_returned_amounts({self.line.id: -2, self.other_line.id: 10})
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.returned(), {self.line.id: 0, self.other_line.id: 10})
+
+    def test_rejects_returning_more_than_the_quantity(self):
+        self.assertInvalid({self.line.id: 9}, {self.line.id: InvalidReturnedAmount.GREATER_THAN_PENDING})
+        self.assertInvalid({self.line.id: 11}, {self.line.id: InvalidReturnedAmount.GREATER_THAN_ASSIGNED})
+        self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 0})
+
+    def test_rejects_taking_back_below_zero(self):
+        self.assertInvalid({self.line.id: -3}, {self.line.id: InvalidReturnedAmount.NEGATIVE})
+        self.assertEqual(self.returned()[self.line.id], 2)
+
+    def test_rejects_returns_before_the_assignment(self):
+        self.assertInvalid(
+            {self.line.id: 1}, {self.line.id: InvalidReturnedAmount.BEFORE_ASSIGNMENT},
+            returned_on=self.today - datetime.timedelta(days=1)
+        )
+
+    def test_the_database_keeps_returned_amounts_in_range(self):
+        for returned_amount in (-1, 11):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                DetailAssignment.objects.filter(pk=self.line.pk).update(returned_amount=returned_amount)
+
+    def test_reports_a_reason_per_line_and_rolls_back_only_its_savepoint(self):
+        missing_id = self.other_line.id + 100
+        with transaction.atomic():
+            self.assertInvalid(
+                {self.line.id: 1, self.other_line.id: 11, missing_id: 1},
+                {self.other_line.id: InvalidReturnedAmount.GREATER_THAN_ASSIGNED,
+                 missing_id: InvalidReturnedAmount.NOT_FOUND}
+            )
+            # The valid line was not updated and the outer transaction is still usable
+            self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 0})
+
+
+class DevolutionViewTests(ReturnedAmountTestCase):
+    """
+    The devolution endpoints and the messages of each InvalidReturnedAmount reason.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user('cashier', password='secret')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def register(self, detail_assignment_id, quantity):
+        return self.client.post(
+            f'/api/v1/devolutions/{detail_assignment_id}/register-devolution/', {'quantity': quantity}, format='json'
+        )
+
+    def test_register_rejects_an_over_return(self):
+        response = self.register(self.line.id, 9)
+        self.assertEqual((response.status_code, response.data['message']),
+                         (400, 'The quantity returned is greater than the quantity assigned'))
+
+        response = self.register(self.line.id, 11)
+        self.assertEqual((response.status_code, response.data['message']),
+                         (400, 'Quantity to return is greater than the quantity assigned'))
+
+        response = self.register(self.other_line.id + 100, 1)
+        self.assertEqual((response.status_code, response.data['message']), (404, 'Detail Assignment not found'))
+
+        self.assertFalse(Devolution.objects.exists())
+        self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 0})
+
+    def test_delete_takes_the_devolution_back(self):
+        devolution_id = self.register(self.line.id, 3).data['id']
+        self.assertEqual(self.returned()[self.line.id], 5)
+
+        response = self.client.delete(f'/api/v1/devolutions/{devolution_id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.returned()[self.line.id], 2)
+
+    def test_delete_rejects_a_negative_take_back(self):
+        devolution = Devolution.objects.create(detail_assignment=self.other_line, quantity=3, devolution_date=self.today)
+
+        response = self.client.delete(f'/api/v1/devolutions/{devolution.id}/')
+
+        self.assertEqual((response.status_code, response.data['message']),
+                         (400, 'The quantity returned cannot be negative'))
+        self.assertTrue(Devolution.objects.filter(pk=devolution.pk).exists())
+        self.assertEqual(self.returned()[self.other_line.id], 0)
+
+    def test_moving_a_devolution_moves_its_quantity(self):
+        devolution_id = self.register(self.line.id, 3).data['id']
+
+        response = self.client.patch(
+            f'/api/v1/devolutions/{devolution_id}/', {'detail_assignment_id': self.other_line.id}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 3})
+        self.assertEqual(Devolution.objects.get(pk=devolution_id).detail_assignment_id, self.other_line.id)
+
+    def test_moving_a_devolution_to_a_full_line_changes_nothing(self):
+        devolution_id = self.register(self.other_line.id, 9).data['id']
+
+        response = self.client.patch(
+            f'/api/v1/devolutions/{devolution_id}/', {'detail_assignment_id': self.line.id}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['quantity'], 'The quantity returned is greater than the quantity assigned.')
+        self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 9})
+        self.assertEqual(Devolution.objects.get(pk=devolution_id).detail_assignment_id, self.other_line.id)
+
+    def test_bulk_registration_rolls_back_every_line_when_one_fails(self):
+        response = self.client.post('/api/v1/devolutions/bulk-register-devolution/', {'lines': [
+            {'detail_assignment_id': self.line.id, 'quantity': 3},
+            {'detail_assignment_id': self.other_line.id, 'quantity': 11},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{
+            'detail_assignment_id': self.other_line.id,
+            'message': 'Quantity to return is greater than the quantity assigned',
+        }])
+        self.assertFalse(Devolution.objects.exists())
+        self.assertEqual(self.returned(), {self.line.id: 2, self.other_line.id: 0})
+
+    def test_bulk_registration_applies_every_line(self):
+        response = self.client.post('/api/v1/devolutions/bulk-register-devolution/', {'lines': [
+            {'detail_assignment_id': self.line.id, 'quantity': 3},
+            {'detail_assignment_id': self.other_line.id, 'quantity': 10},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(self.returned(), {self.line.id: 5, self.other_line.id: 10})
@@ -1,73 +1,197 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
-from django.utils import timezone
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from core.pagination import CustomPagination
+from core.pagination import OptionalKeysetPagination
+from detail_assignment.exceptions import InvalidReturnedAmount
 from detail_assignment.models import DetailAssignment
 from devolution.filters import DevolutionFilter
 from devolution.models import Devolution
 from devolution.serializer import DevolutionSerializer
+from product.prices import today_in_peru
+from report.models import DailySales
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
+RETURNED_AMOUNT_MESSAGES = {
+    InvalidReturnedAmount.NOT_FOUND: 'Detail Assignment not found',
+    InvalidReturnedAmount.GREATER_THAN_ASSIGNED: 'Quantity to return is greater than the quantity assigned',
+    InvalidReturnedAmount.BEFORE_ASSIGNMENT: 'Devolution date is less than the assignment date',
+    InvalidReturnedAmount.GREATER_THAN_PENDING: 'The quantity returned is greater than the quantity assigned',
+    InvalidReturnedAmount.NEGATIVE: 'The quantity returned cannot be negative',
+}
+
 class DevolutionViewSet(viewsets.ModelViewSet):
     # JWT Authentication
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    queryset = Devolution.objects.all()
+    queryset = Devolution.objects.for_serializer().order_by('-devolution_date', '-id')
     serializer_class = DevolutionSerializer
-    pagination_class = CustomPagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-devolution_date', '-id')
     filter_backends = [DjangoFilterBackend]
     filterset_class = DevolutionFilter
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'list': {'queries': 3},
+        'retrieve': {'queries': 2},
+        'detail_assignment_devolutions': {'queries': 3},
+        'bulk_register_devolution': {'queries': 14},
+    }
 
     # Delete Method
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        detail_assignment = instance.detail_assignment
-        detail_assignment.returned_amount -= instance.quantity
-        detail_assignment.save()
-        instance.soft_delete()
+        with transaction.atomic():
+            # Lock the devolution so concurrent deletes do not take it back twice
+            instance = get_object_or_404(Devolution.objects.select_for_update(), pk=instance.pk)
+            # Take the devolution back with a conditional update instead of saving the line
+            try:
+                DetailAssignment.objects.add_returned_amounts({instance.detail_assignment_id: -instance.quantity})
+            except InvalidReturnedAmount as error:
+                return Response({'message': RETURNED_AMOUNT_MESSAGES[error.reasons[instance.detail_assignment_id]]},
+                                status=status.HTTP_400_BAD_REQUEST)
+            instance.soft_delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['post'], url_path='(?P<detail_assignment_id>[^/.]+)/register-devolution')
     def register_devolution(self, request, detail_assignment_id=None):
-        quantity = request.data.get('quantity')
-        devolution_date = timezone.now().date()
         try:
-            detail_assignment = DetailAssignment.objects.get(pk=detail_assignment_id)
-        except DetailAssignment.DoesNotExist:
-            return Response({'message': 'Detail Assignment not found'}, status=status.HTTP_404_NOT_FOUND)
+            detail_assignment_id = int(detail_assignment_id)
+            quantity = int(request.data.get('quantity'))
+        except (TypeError, ValueError):
+            return Response({'message': 'Quantity must be a positive number'}, status=status.HTTP_400_BAD_REQUEST)
+        if quantity <= 0:
+            return Response({'message': 'Quantity must be a positive number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        devolution_date = today_in_peru()
+        with transaction.atomic():
+            # The conditional update validates the quantity and the date, so concurrent returns need no lock
+            try:
+                DetailAssignment.objects.add_returned_amounts({detail_assignment_id: quantity}, returned_on=devolution_date)
+            except InvalidReturnedAmount as error:
+                reason = error.reasons[detail_assignment_id]
+                return Response({'message': RETURNED_AMOUNT_MESSAGES[reason]},
+                                status=status.HTTP_404_NOT_FOUND if reason == InvalidReturnedAmount.NOT_FOUND
+                                else status.HTTP_400_BAD_REQUEST)
 
-        if quantity > detail_assignment.quantity:
-            return Response({'message': 'Quantity to return is greater than the quantity assigned'},
-                            status=status.HTTP_400_BAD_REQUEST)
+            devolution = Devolution.objects.create(
+                detail_assignment_id=detail_assignment_id,
+                quantity=quantity,
+                devolution_date=devolution_date
+            )
 
-        if devolution_date < detail_assignment.assignment.date_assignment:
-            return Response({'message': 'Devolution date is less than the assignment date'},
-                            status=status.HTTP_400_BAD_REQUEST)
+        # Reload the devolution with the joins of the serializer
+        serializer = DevolutionSerializer(self.get_queryset().get(pk=devolution.pk))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        if detail_assignment.returned_amount + quantity > detail_assignment.quantity:
-            return Response({'message': 'The quantity returned is greater than the quantity assigned'},
-                            status=status.HTTP_400_BAD_REQUEST)
+    def parse_devolution_lines(self, data):
+        """
+        Parse the body of the bulk devolution action.
 
-        detail_assignment.returned_amount += quantity
-        detail_assignment.save()
+        Args:
+            data: A list of lines, or a dict with a `lines` list.
 
-        devolution = Devolution.objects.create(
-            detail_assignment=detail_assignment,
-            quantity=quantity,
-            devolution_date=devolution_date
-        )
+        Returns:
+            tuple: The parsed lines as (detail_assignment_id, quantity) tuples
+                and the indexes of the invalid lines.
+        """
+        lines = data.get('lines', []) if isinstance(data, dict) else data
 
-        serializer = DevolutionSerializer(devolution)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        parsed, invalid = [], []
+        for index, line in enumerate(lines if isinstance(lines, list) else []):
+            try:
+                parsed_line = (int(line['detail_assignment_id']), int(line['quantity']))
+            except (KeyError, TypeError, ValueError):
+                invalid.append(index)
+                continue
+            if parsed_line[1] <= 0:
+                invalid.append(index)
+                continue
+            parsed.append(parsed_line)
+
+        return parsed, invalid
+
+    @action(detail=False, methods=['post'], url_path='bulk-register-devolution')
+    def bulk_register_devolution(self, request):
+        """
+        Register the devolutions of many detail assignments at once.
+
+        Each line has a `detail_assignment_id` and the `quantity` returned,
+        with the same rules as `register_devolution`. The returned amounts are
+        validated and incremented with one conditional UPDATE and the
+        devolutions are inserted with one bulk insert, all in one transaction:
+        either every line is registered or none of them is.
+
+        Args:
+            request (Request): The request object containing the lines.
+
+        Returns:
+            Response: The devolutions created and the new returned amount of each line.
+        """
+        lines, invalid = self.parse_devolution_lines(request.data)
+        if invalid:
+            return Response({'message': f'Invalid lines: {invalid}'}, status=status.HTTP_400_BAD_REQUEST)
+        if not lines:
+            return Response({'message': 'At least one line is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        quantities = {}
+        for detail_assignment_id, quantity in lines:
+            if detail_assignment_id in quantities:
+                return Response({'message': f'Duplicated line for detail assignment {detail_assignment_id}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            quantities[detail_assignment_id] = quantity
+
+        devolution_date = today_in_peru()
+        with transaction.atomic():
+            # One conditional update validates and applies every line, without locks
+            try:
+                DetailAssignment.objects.add_returned_amounts(quantities, returned_on=devolution_date)
+            except InvalidReturnedAmount as error:
+                errors = [
+                    {'detail_assignment_id': detail_assignment_id, 'message': RETURNED_AMOUNT_MESSAGES[reason]}
+                    for detail_assignment_id, reason in error.reasons.items()
+                ]
+                return Response({'message': 'Some devolutions are not valid', 'errors': errors},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            devolutions = Devolution.objects.bulk_create([
+                Devolution(detail_assignment_id=detail_assignment_id, quantity=quantity, devolution_date=devolution_date)
+                for detail_assignment_id, quantity in quantities.items()
+            ])
+            details = {
+                detail['id']: detail
+                for detail in DetailAssignment.objects.filter(id__in=quantities).values(
+                    'id', 'returned_amount', 'assignment_id', 'product_id'
+                )
+            }
+
+            # The bulk insert and the update do not send the signals that keep the daily sales in sync
+            assignment_ids = {detail['assignment_id'] for detail in details.values()}
+            product_ids = {detail['product_id'] for detail in details.values()}
+            transaction.on_commit(lambda: DailySales.objects.refresh_assignments(assignment_ids, product_ids))
+
+        return Response({
+            'created': len(devolutions),
+            'devolution_date': devolution_date,
+            'devolutions': [
+                {
+                    'id': devolution.id,
+                    'detail_assignment_id': devolution.detail_assignment_id,
+                    'quantity': devolution.quantity,
+                    'returned_amount': details[devolution.detail_assignment_id]['returned_amount'],
+                }
+                for devolution in devolutions
+            ],
+        }, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['get'], url_path='detail-assignment-devolutions/(?P<detail_assignment_id>[^/.]+)')
     def detail_assignment_devolutions(self, request, detail_assignment_id=None):
-        devolutions = Devolution.objects.filter(detail_assignment_id=detail_assignment_id, delete_at__isnull=True)
+        devolutions = self.get_queryset().filter(detail_assignment_id=detail_assignment_id)
         page = self.paginate_queryset(devolutions)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -1,12 +1,14 @@
 import django_filters
+from core.filters import PeriodFilterSet
 from .models import Finance
 
 
-class FinanceFilter(django_filters.FilterSet):
+class FinanceFilter(PeriodFilterSet):
     """
     Filter for Finance model.
-    Allow filtering by date, type of operation, description, and amount.
+    Allow filtering by date, period, type of operation, description, and amount.
     """
+    period_field = 'date_finance'
 
     # Filter by description (case-sensitive partial match)
     description = django_filters.CharFilter(lookup_expr='icontains')
@@ -32,5 +34,9 @@ class FinanceFilter(django_filters.FilterSet):
             'date_finance_from',
             'date_finance_to',
             'amount_min',
-            'amount_max'
+            'amount_max',
+            'year',
+            'month',
+            'quarter',
+            'week'
         ]
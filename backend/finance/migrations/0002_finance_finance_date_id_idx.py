@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='finance',
+            index=models.Index(fields=['date_finance', 'id'], name='finance_date_id_idx'),
+        ),
+    ]
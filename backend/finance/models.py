@@ -13,6 +13,12 @@ class Finance(TimeStampedModel):
     type_operation = models.CharField(choices=OPERATION, null=False, blank=False)
     amount = models.DecimalField(max_digits=10, decimal_places=3, null=False, blank=False)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of FinanceViewSet
+            models.Index(fields=['date_finance', 'id'], name='finance_date_id_idx'),
+        ]
+
     def __str__(self):
         return f'{self.type_operation}' + ' ' + f'{self.amount}' + ' ' + f'{self.date_finance}'
     
\ No newline at end of file
@@ -1,5 +1,9 @@
 """
-Signals for the app.
+Signals for cache invalidation in finance app.
 """
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
+from core.signals import register_cache_invalidation_signals
+from finance.models import Finance
+from report.managers import RECONCILIATION_NAMESPACE
+
+# The finance records are part of the cached daily reconciliations
+register_cache_invalidation_signals(Finance, RECONCILIATION_NAMESPACE)
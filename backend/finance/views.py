@@ -10,7 +10,8 @@ from decimal import Decimal
 from .models import Finance
 from .serializer import FinanceSerializer
 from .filters import FinanceFilter
-from core.pagination import CustomPagination
+from core.filters import period_range
+from core.pagination import OptionalKeysetPagination
 
 
 # Create your views here.
@@ -21,7 +22,8 @@ class FinanceViewSet(viewsets.ModelViewSet):
 
     queryset = Finance.objects.all().order_by('-date_finance')
     serializer_class = FinanceSerializer
-    pagination_class = CustomPagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-date_finance', '-id')
 
     # Settings of filters
     filter_backends = [DjangoFilterBackend]
@@ -101,9 +103,18 @@ class FinanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        try:
+            start, end = period_range(int(year), int(month))
+        except ValueError:
+            return Response(
+                {'error': 'The year and month parameters must be a valid year and month (1-12)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Half-open range instead of __year/__month, so the index of date_finance is used
         monthly_transactions = Finance.objects.filter(
-            date_finance__year=year,
-            date_finance__month=month
+            date_finance__gte=start,
+            date_finance__lt=end
         )
 
         # Calculate total of month
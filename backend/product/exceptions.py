@@ -0,0 +1,15 @@
+class InsufficientStock(Exception):
+    """
+    Raised when a stock reservation cannot be applied because a product does
+    not exist or does not have enough available stock.
+
+    Attributes:
+        available (dict): Available stock by product id of the products that
+            could not be reserved (None for the products that do not exist).
+        requested (dict): Quantity requested by product id of those products.
+    """
+
+    def __init__(self, available, requested):
+        self.available = available
+        self.requested = requested
+        super().__init__(f'Insufficient stock for products {sorted(available)}')
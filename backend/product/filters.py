@@ -1,12 +1,13 @@
 import django_filters
+from core.search import search_queryset
 from .models import Product
 
 class ProductFilter(django_filters.FilterSet):
     # Filter by type product
     product_type = django_filters.CharFilter(field_name="type_product__type", lookup_expr='icontains')
     
-    # Filter by name of product
-    product_name = django_filters.CharFilter(field_name="name", lookup_expr='icontains')
+    # Filter by name of product, best match first
+    product_name = django_filters.CharFilter(method='filter_product_name')
     
     # Filter by state of product
     status_product = django_filters.BooleanFilter(field_name="status_product")
@@ -35,4 +36,7 @@ class ProductFilter(django_filters.FilterSet):
             'created_date',
             'created_date_from',
             'created_date_to'
-        ]
\ No newline at end of file
+        ]
+
+    def filter_product_name(self, queryset, name, value):
+        return search_queryset(queryset, value, ['name'])
\ No newline at end of file
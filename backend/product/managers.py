@@ -0,0 +1,29 @@
+from core.managers import SoftDeleteManager
+from .querysets import ProductQuerySet
+
+
+class ProductManager(SoftDeleteManager):
+    """
+    Manager class of the alive products.
+    """
+    queryset_class = ProductQuerySet
+
+    def with_assignment_totals(self):
+        """
+        Returns the alive products annotated with their assigned and returned quantities.
+        """
+        return self.get_queryset().with_assignment_totals()
+
+    def for_serializer(self):
+        """
+        Returns the alive products with everything the ProductSerializer reads,
+        ready to be used as the queryset of a Prefetch.
+        """
+        return self.with_assignment_totals().select_related('type_product')
+
+    def reserve_stock(self, quantities):
+        """
+        Reserve (or release, with negative quantities) the stock of the alive
+        products atomically. See ProductQuerySet.reserve_stock.
+        """
+        return self.get_queryset().reserve_stock(quantities)
@@ -1,6 +1,9 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from core.models import TimeStampedModel
 from type_product.models import TypeProduct
+from .managers import ProductManager
 
 # Create your models here.
 class Product(TimeStampedModel):
@@ -16,6 +19,14 @@ class Product(TimeStampedModel):
     type_product = models.ForeignKey(TypeProduct, on_delete=models.CASCADE, null=True, blank=True)
     assignments = models.ManyToManyField('assignment.Assignment', related_name='products', blank=True)
 
+    objects = ProductManager()
+
+    class Meta:
+        # Trigram index for the icontains search on the name, see core.search
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if self.base_price is not None and self.discount_percent is not None:
             discount = self.base_price * self.discount_percent
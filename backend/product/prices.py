@@ -0,0 +1,97 @@
+"""
+Price resolution of the products.
+
+The prices of the products a write needs are loaded into a compact table
+(one tuple per product and one per type of product) with a single query, so
+saves and bulk writes resolve the price of a day for many lines without a
+query per line. The table is loaded from the database on every call, so a
+price changed by another process is never missed.
+"""
+import datetime
+import pytz
+
+PERU_TZ = pytz.timezone('America/Lima')
+WEEKDAY_PRICE_FIELDS = (
+    'monday_price', 'tuesday_price', 'wednesday_price', 'thursday_price',
+    'friday_price', 'saturday_price', 'sunday_price',
+)
+
+
+def today_in_peru():
+    """
+    Returns the current date in America/Lima.
+    """
+    return datetime.datetime.now(PERU_TZ).date()
+
+
+class PriceTable:
+    """
+    In-memory prices of a set of alive products.
+
+    Attributes:
+        products (dict): (type_product_id, is_newspaper, product_price, returns_date) by product id.
+        type_products (dict): The prices from Monday to Sunday by type of product id.
+    """
+
+    def __init__(self, products, type_products):
+        self.products = products
+        self.type_products = type_products
+
+    @classmethod
+    def load(cls, product_ids):
+        from product.models import Product
+
+        products, type_products = {}, {}
+        for product_id, type_product_id, type_name, product_price, returns_date, type_deleted_at, *day_prices in (
+            Product.objects.filter(id__in=set(product_ids)).values_list(
+                'id', 'type_product_id', 'type_product__type', 'product_price', 'returns_date',
+                'type_product__delete_at', *(f'type_product__{field}' for field in WEEKDAY_PRICE_FIELDS)
+            )
+        ):
+            products[product_id] = (type_product_id, type_name == 'NEWSPAPER', product_price, returns_date)
+            # Only the alive types of product have prices
+            if type_product_id is not None and type_deleted_at is None:
+                type_products[type_product_id] = tuple(day_prices)
+        return cls(products, type_products)
+
+    def day_price(self, product_id, day=None):
+        """
+        Returns the price of the type of the product for the weekday of `day`
+        (today in Peru by default), or None if the product has no type.
+        """
+        product = self.products.get(product_id)
+        if product is None or product[0] not in self.type_products:
+            return None
+        day = day or today_in_peru()
+        return self.type_products[product[0]][day.weekday()]
+
+    def unit_price(self, product_id, day=None):
+        """
+        Returns the price a product is assigned at on `day` (today in Peru by
+        default): the price of the weekday for newspapers and the product
+        price for everything else.
+        """
+        product = self.products.get(product_id)
+        if product is None:
+            return None
+        if product[1]:
+            return self.day_price(product_id, day)
+        return product[2]
+
+    def return_date(self, product_id, day=None):
+        """
+        Returns the date the unsold units of a product assigned on `day`
+        (today in Peru by default) must be returned.
+        """
+        product = self.products.get(product_id)
+        day = day or today_in_peru()
+        if product is None:
+            return None
+        return day + datetime.timedelta(days=product[3])
+
+
+def get_price_table(product_ids):
+    """
+    Returns the price table of the alive products in `product_ids`.
+    """
+    return PriceTable.load(product_ids)
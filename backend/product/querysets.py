@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.querysets import SoftDeleteQuerySet
+from .exceptions import InsufficientStock
+
+
+def assignment_totals(product='pk'):
+    """
+    Returns the subqueries of the quantities assigned and returned of a
+    product, to annotate querysets of products or of rows related to one.
+
+    Args:
+        product (str): Path from the annotated model to the product.
+
+    Returns:
+        dict: The `assigned_quantity` and `returned_quantity` expressions.
+    """
+    from detail_assignment.models import DetailAssignment
+
+    details = DetailAssignment.objects.filter(product=OuterRef(product)).order_by().values('product')
+    zero = Value(0, output_field=IntegerField())
+
+    return {
+        'assigned_quantity': Coalesce(Subquery(details.annotate(total=Sum('quantity')).values('total')), zero),
+        'returned_quantity': Coalesce(Subquery(details.annotate(total=Sum('returned_amount')).values('total')), zero),
+    }
+
+
+class ProductQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of products with the aggregates used by the ProductSerializer.
+    """
+
+    def with_assignment_totals(self):
+        """
+        Annotate the quantities assigned and returned of each product, so the
+        ProductSerializer does not aggregate the detail assignments per product.
+        """
+        return self.annotate(**assignment_totals())
+
+    def reserve_stock(self, quantities):
+        """
+        Add quantities to the reserved stock of the products with a single
+        conditional UPDATE, so concurrent reservations neither lose updates
+        nor reserve more than the available stock. Negative quantities
+        release stock and never fail.
+
+        Either every product is reserved or none of them is.
+
+        Args:
+            quantities (dict): Quantity to reserve by product id.
+
+        Returns:
+            int: The number of products updated.
+
+        Raises:
+            InsufficientStock: If a product does not exist or does not have
+                enough available stock.
+        """
+        quantities = {pk: quantity for pk, quantity in quantities.items() if quantity}
+        if not quantities:
+            return 0
+
+        delta = Case(
+            *[When(pk=pk, then=Value(quantity)) for pk, quantity in quantities.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        condition = Q()
+        for pk, quantity in quantities.items():
+            if quantity > 0:
+                condition |= Q(pk=pk, total_quantity__gte=F('reserved_quantity') + quantity)
+            else:
+                condition |= Q(pk=pk)
+
+        with transaction.atomic(using=self.db):
+            updated = self.filter(condition).update(
+                reserved_quantity=F('reserved_quantity') + delta,
+                # Same rule as Product.save, on the new reserved quantity
+                status_product=Case(
+                    When(total_quantity__isnull=True, then=F('status_product')),
+                    When(total_quantity__gt=F('reserved_quantity') + delta, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                ),
+                update_at=timezone.now(),
+            )
+            if updated != len(quantities):
+                transaction.set_rollback(True, using=self.db)
+
+        if updated == len(quantities):
+            return updated
+
+        stock = {
+            pk: (total or 0) - reserved
+            for pk, total, reserved in self.filter(pk__in=quantities).values_list(
+                'pk', 'total_quantity', 'reserved_quantity'
+            )
+        }
+        available = {
+            pk: stock.get(pk) for pk, quantity in quantities.items()
+            if pk not in stock or 0 < quantity and stock[pk] < quantity
+        }
+        # The stock may have been released since the UPDATE
+        available = available or {pk: stock.get(pk) for pk in quantities}
+        raise InsufficientStock(available, {pk: quantities[pk] for pk in available})
@@ -1,6 +1,6 @@
 from rest_framework import serializers
-from datetime import datetime
 from .models import Product
+from .prices import WEEKDAY_PRICE_FIELDS, today_in_peru
 from type_product.serializer import TypeProductSerializer
 from django.db.models import Sum
 
@@ -23,22 +23,10 @@ class ProductSerializer(serializers.ModelSerializer):
         }
 
     def get_current_day_price(self, obj):
-        """Get the price for the current day from type_product"""
-        if not obj.type_product:
+        """Get the price for the current day (in Peru) from type_product"""
+        if not obj.type_product_id:
             return None
-        
-        current_day = datetime.now().strftime('%A').lower()
-        day_mapping = {
-            'monday': obj.type_product.monday_price,
-            'tuesday': obj.type_product.tuesday_price,
-            'wednesday': obj.type_product.wednesday_price,
-            'thursday': obj.type_product.thursday_price,
-            'friday': obj.type_product.friday_price,
-            'saturday': obj.type_product.saturday_price,
-            'sunday': obj.type_product.sunday_price,
-        }
-        
-        return day_mapping.get(current_day)
+        return getattr(obj.type_product, WEEKDAY_PRICE_FIELDS[today_in_peru().weekday()])
 
     def get_available_stock(self, obj):
         """
@@ -55,18 +43,22 @@ class ProductSerializer(serializers.ModelSerializer):
         Where:
         - assigned_quantity: sum of all quantities in DetailAssignment (PENDING and FINISHED)
         - returned_quantity: sum of all returned amounts in DetailAssignment
+
+        Both sums are read from the annotations of
+        Product.objects.with_assignment_totals() when present.
         """
-        from detail_assignment.models import DetailAssignment
-        
-        # Sum all quantities assigned to this product (regardless of status)
-        assigned_quantity = DetailAssignment.objects.filter(
-            product=obj
-        ).aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # Sum all quantities returned for this product
-        returned_quantity = DetailAssignment.objects.filter(
-            product=obj
-        ).aggregate(total=Sum('returned_amount'))['total'] or 0
+        assigned_quantity = getattr(obj, 'assigned_quantity', None)
+        returned_quantity = getattr(obj, 'returned_quantity', None)
+
+        if assigned_quantity is None or returned_quantity is None:
+            from detail_assignment.models import DetailAssignment
+
+            # Sum all quantities assigned and returned for this product (regardless of status)
+            totals = DetailAssignment.objects.filter(
+                product=obj
+            ).aggregate(assigned=Sum('quantity'), returned=Sum('returned_amount'))
+            assigned_quantity = totals['assigned'] or 0
+            returned_quantity = totals['returned'] or 0
         
         # Calculate available quantity
         available = obj.total_quantity - assigned_quantity + returned_quantity
@@ -1,8 +0,0 @@
-"""
-Signals for product app.
-"""
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-
-from product.models import Product
-
@@ -1,3 +1,44 @@
 from django.test import TestCase
 
-# Create your tests here.
+from product.exceptions import InsufficientStock
+from product.models import Product
+from type_product.models import TypeProduct
+
+
+class ReserveStockTests(TestCase):
+    """
+    Product.objects.reserve_stock: one conditional UPDATE for every product.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        type_product = TypeProduct.objects.create(name='PRODUCTO', type='PRODUCT')
+        cls.book = Product.objects.create(name='Libro', type_product=type_product, base_price=10, total_quantity=10)
+        cls.magazine = Product.objects.create(name='Revista', type_product=type_product, base_price=5, total_quantity=4)
+
+    def reserved(self):
+        return dict(Product.all_objects.values_list('id', 'reserved_quantity'))
+
+    def test_reserves_every_product(self):
+        self.assertEqual(Product.objects.reserve_stock({self.book.id: 10, self.magazine.id: 3}), 2)
+        self.assertEqual(self.reserved(), {self.book.id: 10, self.magazine.id: 3})
+
+    def test_reserves_nothing_when_a_product_is_short(self):
+        with self.assertRaises(InsufficientStock) as context:
+            Product.objects.reserve_stock({self.book.id: 2, self.magazine.id: 5})
+
+        self.assertEqual(context.exception.available, {self.magazine.id: 4})
+        self.assertEqual(context.exception.requested, {self.magazine.id: 5})
+        self.assertEqual(self.reserved(), {self.book.id: 0, self.magazine.id: 0})
+
+    def test_releases_stock_with_negative_quantities(self):
+        Product.objects.reserve_stock({self.book.id: 6})
+        Product.objects.reserve_stock({self.book.id: -4})
+        self.assertEqual(self.reserved()[self.book.id], 2)
+
+    def test_fails_for_deleted_products(self):
+        Product.objects.filter(pk=self.book.pk).soft_delete()
+
+        with self.assertRaises(InsufficientStock) as context:
+            Product.objects.reserve_stock({self.book.id: -1})
+        self.assertEqual(context.exception.available, {self.book.id: None})
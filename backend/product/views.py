@@ -17,11 +17,16 @@ class ProductViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    queryset = Product.objects.all()
+    queryset = Product.objects.for_serializer()
     serializer_class = ProductSerializer
     pagination_class = CustomPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = ProductFilter
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'list': {'queries': 3},
+        'retrieve': {'queries': 2},
+    }
 
     # Delete Method
     def destroy(self, request, *args, **kwargs):
@@ -32,7 +37,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     # Custom action to list products with status_product set to False
     @action(detail=False, methods=['get'], url_path='inactive-products')
     def inactive_products(self, request):
-        inactive_products = Product.objects.filter(status_product=False, delete_at__isnull=True)
+        inactive_products = self.get_queryset().filter(status_product=False)
         page = self.paginate_queryset(inactive_products)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -54,7 +59,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Formato de fecha inválido. Usa YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Primero filtramos por fecha y productos no eliminados
-        products = Product.objects.filter(create_at__date=query_date, delete_at__isnull=True)
+        products = self.get_queryset().filter(create_at__date=query_date)
 
         # Si se envía el filtro de tipo, lo aplicamos
         if product_type:
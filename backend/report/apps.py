@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+class ReportConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'report'
+
+    def ready(self):
+        import report.signals  # noqa: F401
@@ -0,0 +1,35 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+
+from report.models import DailySales
+
+
+class Command(BaseCommand):
+    """
+    Backfill or rebuild the DailySales rollup from the detail assignments.
+    """
+    help = 'Rebuild the daily sales rollup used by the reports (the whole history by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end-date', help='Last day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction.')
+
+    def parse_date(self, value, name):
+        if value is None:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid {name}, use YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        start_date = self.parse_date(options['start_date'], '--start-date')
+        end_date = self.parse_date(options['end_date'], '--end-date')
+        if start_date and end_date and start_date > end_date:
+            raise CommandError('--start-date must be before --end-date.')
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be greater than 0.')
+
+        written = DailySales.objects.rebuild(start_date, end_date, chunk_days=options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(f'{written} daily sales cell(s) rebuilt.'))
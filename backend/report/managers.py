@@ -0,0 +1,137 @@
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import Max, Min
+
+from assignment.models import Assignment
+from core.cache import bump_cache_version
+from detail_assignment.models import DetailAssignment
+from report.rollup import daily_sales_cells
+
+# Namespace of the cached reconciliations of closed days (report.reconciliation).
+# It is bumped when the daily sales change and when a finance record changes
+# (finance.signals); the versions of the `cash` and `yapes` namespaces are part
+# of the cache key.
+RECONCILIATION_NAMESPACE = 'reconciliation'
+
+
+class DailySalesManager(models.Manager):
+    """
+    Manager class to keep the DailySales rollup in sync with the detail assignments.
+    """
+    update_fields = ['quantity', 'returned_amount', 'assigned_total', 'returned_total']
+
+    def aggregate_cells(self, details):
+        """
+        Returns the DailySales rows computed from a queryset of detail assignments.
+        """
+        return list(daily_sales_cells(self.model, details))
+
+    def refresh(self, dates, seller_ids, product_ids=None):
+        """
+        Recompute the cells of the given days and sellers (and products, all of
+        them by default) from the alive detail assignments.
+
+        The cells are recomputed instead of adjusted, so refreshing a cell
+        twice or refreshing cells that did not change is harmless. The
+        assignments of the cells are locked before the sums are read, so two
+        overlapping refreshes of a cell run one after the other and the last
+        one writes the latest sums.
+        """
+        dates, seller_ids = set(dates), set(seller_ids)
+        if not dates or not seller_ids:
+            return
+
+        details = DetailAssignment.objects.filter(
+            assignment__date_assignment__in=dates,
+            assignment__seller_id__in=seller_ids
+        )
+        cells = self.filter(date__in=dates, seller_id__in=seller_ids)
+
+        if product_ids is not None:
+            product_ids = set(product_ids)
+            if not product_ids:
+                return
+            details = details.filter(product_id__in=product_ids)
+            cells = cells.filter(product_id__in=product_ids)
+
+        with transaction.atomic(using=self.db):
+            list(Assignment.all_objects.select_for_update().filter(
+                date_assignment__in=dates,
+                seller_id__in=seller_ids
+            ).order_by('id').values_list('id'))
+            rows = self.aggregate_cells(details)
+            keys = {(row.date, row.seller_id, row.product_id) for row in rows}
+
+            stale_ids = [
+                pk for pk, date, seller_id, product_id in cells.values_list('pk', 'date', 'seller_id', 'product_id')
+                if (date, seller_id, product_id) not in keys
+            ]
+            if stale_ids:
+                self.filter(pk__in=stale_ids).delete()
+
+            if rows:
+                self.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=['date', 'seller', 'product'],
+                    update_fields=self.update_fields,
+                )
+            transaction.on_commit(lambda: bump_cache_version(RECONCILIATION_NAMESPACE), using=self.db)
+
+    def refresh_assignments(self, assignment_ids, product_ids=None):
+        """
+        Recompute the cells of the given assignments (and products, all of them
+        by default).
+        """
+        assignments = Assignment.all_objects.filter(id__in=set(assignment_ids)).values_list('date_assignment', 'seller_id')
+        dates, seller_ids = set(), set()
+        for date, seller_id in assignments:
+            dates.add(date)
+            seller_ids.add(seller_id)
+        self.refresh(dates, seller_ids, product_ids)
+
+    def rebuild(self, start_date=None, end_date=None, chunk_days=31):
+        """
+        Rebuild the rollup from the detail assignments between two dates (the
+        whole history by default), one chunk of days per transaction.
+
+        Returns:
+            int: The number of cells written.
+        """
+        cells = self.all()
+        if start_date is not None:
+            cells = cells.filter(date__gte=start_date)
+        if end_date is not None:
+            cells = cells.filter(date__lte=end_date)
+
+        if start_date is None or end_date is None:
+            bounds = DetailAssignment.objects.aggregate(
+                first=Min('assignment__date_assignment'),
+                last=Max('assignment__date_assignment')
+            )
+            start_date = start_date or bounds['first']
+            end_date = end_date or bounds['last']
+
+        if start_date is None or end_date is None:
+            cells.delete()
+            bump_cache_version(RECONCILIATION_NAMESPACE)
+            return 0
+
+        # Cells outside the history of detail assignments are stale
+        cells.exclude(date__range=[start_date, end_date]).delete()
+
+        written = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            with transaction.atomic(using=self.db):
+                self.filter(date__range=[chunk_start, chunk_end]).delete()
+                rows = self.aggregate_cells(DetailAssignment.objects.filter(
+                    assignment__date_assignment__range=[chunk_start, chunk_end]
+                ))
+                self.bulk_create(rows, batch_size=1000)
+            written += len(rows)
+            chunk_start = chunk_end + timedelta(days=1)
+
+        bump_cache_version(RECONCILIATION_NAMESPACE)
+        return written
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from report.rollup import daily_sales_cells
+
+
+def backfill_daily_sales(apps, schema_editor):
+    DetailAssignment = apps.get_model('detail_assignment', 'DetailAssignment')
+    DailySales = apps.get_model('report', 'DailySales')
+    DailySales.objects.bulk_create(
+        daily_sales_cells(DailySales, DetailAssignment.objects.filter(delete_at__isnull=True)),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('detail_assignment', '0001_initial'),
+        ('product', '0007_alter_product_discount_percent'),
+        ('seller', '0002_alter_seller_number_seller'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('returned_amount', models.IntegerField(default=0)),
+                ('assigned_total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('returned_total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='product.product')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='seller.seller')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='daily_sales_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'seller', 'product'), name='unique_daily_sales_cell')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
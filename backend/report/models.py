@@ -0,0 +1,43 @@
+from django.db import models
+from product.models import Product
+from report.managers import DailySalesManager
+from seller.models import Seller
+
+
+# Create your models here.
+class DailySales(models.Model):
+    """
+    Rollup of the detail assignments by seller, product and assignment day.
+
+    Each row holds the sums of the alive DetailAssignment rows of one cell so
+    the reports read a row per seller, product and day instead of every
+    detail assignment. The cells are refreshed from the raw rows whenever a
+    DetailAssignment, Devolution or Assignment changes (see report.signals)
+    and can be rebuilt with the `rebuild_daily_sales` command.
+    """
+    date = models.DateField(null=False, blank=False)
+    seller = models.ForeignKey(Seller, on_delete=models.CASCADE, null=False, blank=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=False, blank=False)
+    quantity = models.IntegerField(default=0, null=False, blank=False)
+    returned_amount = models.IntegerField(default=0, null=False, blank=False)
+    assigned_total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00, null=False, blank=False)
+    returned_total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00, null=False, blank=False)
+
+    objects = DailySalesManager()
+
+    class Meta:
+        """
+        Meta class to define constraints and other model-level options.
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'seller', 'product'], name='unique_daily_sales_cell'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_sales_date_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the DailySales instance.
+        """
+        return f'{ self.date }' + ' ' + f'{ self.seller_id }' + ' ' + f'{ self.product_id }' + ' ' + f'{ self.quantity }'
@@ -0,0 +1,108 @@
+"""
+Daily reconciliation of the expected sales with the money counted and received.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Upper
+
+from cash.models import Cash
+from finance.models import Finance
+from report.models import DailySales
+from yape.models import Yape
+
+
+def daily_reconciliation(start_date, end_date):
+    """
+    Reconcile each day between two dates with four grouped queries, whatever
+    the number of days:
+
+    - expected sales: assigned minus returned totals of the daily sales, by
+      type of product;
+    - counted cash: totals of the cash counts, by type of product;
+    - Yape receipts: amount and number of payments;
+    - finance: income and expense.
+
+    The difference of a day is the money collected (cash plus Yape) minus the
+    expected sales. The difference by type of product only covers cash, as
+    the Yape payments are not split by type. Cash counts match the sales of
+    the type of product with the same name (e.g. COMERCIO).
+
+    Args:
+        start_date (date): First day.
+        end_date (date): Last day.
+
+    Returns:
+        list: One dict per day with at least one sale, cash count, Yape
+            payment or finance record, ordered by date.
+    """
+    zero = Decimal('0')
+    days = defaultdict(lambda: {
+        'expected_sales': zero,
+        'cash_total': zero,
+        'yape_total': zero,
+        'yape_count': 0,
+        'finance_income': zero,
+        'finance_expense': zero,
+        'by_type_product': defaultdict(lambda: {'expected_sales': zero, 'cash_total': zero}),
+    })
+
+    sales = DailySales.objects.filter(date__range=[start_date, end_date]).values(
+        'date', type_product=Upper('product__type_product__name')
+    ).annotate(expected_sales=Sum(F('assigned_total') - F('returned_total'))).order_by()
+    for row in sales:
+        day = days[row['date']]
+        day['expected_sales'] += row['expected_sales'] or zero
+        day['by_type_product'][row['type_product']]['expected_sales'] += row['expected_sales'] or zero
+
+    cash = Cash.objects.filter(date_cash__range=[start_date, end_date]).values(
+        'date_cash', 'type_product'
+    ).annotate(cash_total=Sum('total')).order_by()
+    for row in cash:
+        day = days[row['date_cash']]
+        day['cash_total'] += row['cash_total'] or zero
+        day['by_type_product'][row['type_product']]['cash_total'] += row['cash_total'] or zero
+
+    yapes = Yape.objects.filter(date_yape__range=[start_date, end_date]).values('date_yape').annotate(
+        yape_total=Sum('amount'), yape_count=Count('id')
+    ).order_by()
+    for row in yapes:
+        day = days[row['date_yape']]
+        day['yape_total'] = row['yape_total'] or zero
+        day['yape_count'] = row['yape_count']
+
+    finances = Finance.objects.filter(date_finance__range=[start_date, end_date]).values('date_finance').annotate(
+        finance_income=Sum('amount', filter=Q(type_operation='INCOME')),
+        finance_expense=Sum('amount', filter=Q(type_operation='EXPENSE')),
+    ).order_by()
+    for row in finances:
+        day = days[row['date_finance']]
+        day['finance_income'] = row['finance_income'] or zero
+        day['finance_expense'] = row['finance_expense'] or zero
+
+    results = []
+    for date in sorted(days):
+        day = days[date]
+        collected = day['cash_total'] + day['yape_total']
+        results.append({
+            'date': date,
+            'expected_sales': day['expected_sales'],
+            'cash_total': day['cash_total'],
+            'yape_total': day['yape_total'],
+            'yape_count': day['yape_count'],
+            'collected': collected,
+            'difference': collected - day['expected_sales'],
+            'finance_income': day['finance_income'],
+            'finance_expense': day['finance_expense'],
+            'finance_balance': day['finance_income'] - day['finance_expense'],
+            'by_type_product': [
+                {
+                    'type_product': type_product,
+                    'expected_sales': totals['expected_sales'],
+                    'cash_total': totals['cash_total'],
+                    'difference': totals['cash_total'] - totals['expected_sales'],
+                }
+                for type_product, totals in sorted(day['by_type_product'].items(), key=lambda item: item[0] or '')
+            ],
+        })
+    return results
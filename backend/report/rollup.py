@@ -0,0 +1,34 @@
+"""
+Aggregation of the detail assignments into daily sales cells.
+
+The function takes the models as arguments so the data migrations can use
+it with the historical models.
+"""
+from django.db.models import DecimalField, F, Sum
+
+
+def daily_sales_cells(daily_sales_model, details):
+    """
+    Yields the unsaved daily sales cells (one per day, seller and product)
+    computed from a queryset of alive detail assignments.
+    """
+    amount_field = DecimalField(max_digits=14, decimal_places=2)
+    rows = details.values(
+        'assignment__date_assignment', 'assignment__seller_id', 'product_id'
+    ).annotate(
+        sum_quantity=Sum('quantity'),
+        sum_returned_amount=Sum('returned_amount'),
+        sum_assigned_total=Sum(F('quantity') * F('unit_price'), output_field=amount_field),
+        sum_returned_total=Sum(F('returned_amount') * F('unit_price'), output_field=amount_field),
+    ).order_by()
+
+    for row in rows.iterator():
+        yield daily_sales_model(
+            date=row['assignment__date_assignment'],
+            seller_id=row['assignment__seller_id'],
+            product_id=row['product_id'],
+            quantity=row['sum_quantity'],
+            returned_amount=row['sum_returned_amount'],
+            assigned_total=row['sum_assigned_total'],
+            returned_total=row['sum_returned_total'],
+        )
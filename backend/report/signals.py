@@ -0,0 +1,101 @@
+"""
+Signals to keep the DailySales rollup in sync with the detail assignments.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from assignment.models import Assignment
+from detail_assignment.models import DetailAssignment
+from devolution.models import Devolution
+from core.signals import post_restore, pre_soft_delete
+from report.models import DailySales
+
+
+def schedule_refresh(assignment_ids, product_ids=None):
+    """
+    Refresh the cells of the given assignments once the transaction commits.
+    """
+    transaction.on_commit(lambda: DailySales.objects.refresh_assignments(assignment_ids, product_ids))
+
+
+@receiver([post_save, post_delete], sender=DetailAssignment)
+def refresh_detail_assignment_sales(sender, instance, raw=False, **kwargs):
+    """
+    Refresh the cell of a detail assignment (and its previous cell when the
+    assignment or the product changed).
+    """
+    if raw:
+        return
+    loaded_values = getattr(instance, '_loaded_values', {})
+    assignment_ids = {instance.assignment_id, loaded_values.get('assignment_id', instance.assignment_id)}
+    product_ids = {instance.product_id, loaded_values.get('product_id', instance.product_id)}
+    schedule_refresh(assignment_ids, product_ids)
+
+
+@receiver([post_save, post_delete], sender=Devolution)
+def refresh_devolution_sales(sender, instance, raw=False, **kwargs):
+    """
+    Refresh the cell of the detail assignment of a devolution.
+    """
+    if raw:
+        return
+    detail_assignment = instance.detail_assignment
+    schedule_refresh({detail_assignment.assignment_id}, {detail_assignment.product_id})
+
+
+@receiver(post_save, sender=Assignment)
+def refresh_assignment_sales(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Move the cells of an assignment when its date or seller changed.
+    """
+    if raw or created:
+        return
+    loaded_values = getattr(instance, '_loaded_values', {})
+    old_date = loaded_values.get('date_assignment', instance.date_assignment)
+    old_seller_id = loaded_values.get('seller_id', instance.seller_id)
+    if (old_date, old_seller_id) != (instance.date_assignment, instance.seller_id):
+        dates = {old_date, instance.date_assignment}
+        seller_ids = {old_seller_id, instance.seller_id}
+        transaction.on_commit(lambda: DailySales.objects.refresh(dates, seller_ids))
+
+
+@receiver(pre_soft_delete, sender=DetailAssignment)
+def refresh_soft_deleted_sales(sender, queryset, **kwargs):
+    """
+    Refresh the cells of detail assignments soft deleted in bulk.
+    """
+    assignment_ids, product_ids = set(), set()
+    for assignment_id, product_id in queryset.values_list('assignment_id', 'product_id').distinct():
+        assignment_ids.add(assignment_id)
+        product_ids.add(product_id)
+    if assignment_ids:
+        schedule_refresh(assignment_ids, product_ids)
+
+
+@receiver(post_restore, sender=DetailAssignment)
+def refresh_restored_sales(sender, queryset, **kwargs):
+    """
+    Refresh the cells of detail assignments restored in bulk.
+    """
+    refresh_soft_deleted_sales(sender, queryset)
+
+
+@receiver(post_restore, sender=Devolution)
+def refresh_restored_devolution_sales(sender, queryset, **kwargs):
+    """
+    Refresh the cells of the detail assignments of devolutions restored in bulk.
+    """
+    refresh_soft_deleted_sales(
+        DetailAssignment, DetailAssignment.all_objects.filter(id__in=queryset.values('detail_assignment_id'))
+    )
+
+
+@receiver(post_restore, sender=Assignment)
+def refresh_restored_assignment_sales(sender, queryset, **kwargs):
+    """
+    Refresh the cells of assignments restored in bulk.
+    """
+    assignment_ids = set(queryset.values_list('id', flat=True))
+    if assignment_ids:
+        schedule_refresh(assignment_ids)
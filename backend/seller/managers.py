@@ -0,0 +1,58 @@
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+
+class SellerCodeManager(models.Manager):
+    """
+    Manager class of the pool of seller codes.
+    """
+    reservation_time = timedelta(minutes=15)
+
+    def fill(self):
+        """
+        Add the missing codes to the pool.
+
+        Returns:
+            int: The number of codes added.
+        """
+        codes = [
+            f'{self.model.PREFIX}{number}'
+            for number in range(self.model.FIRST_NUMBER, self.model.LAST_NUMBER + 1)
+        ]
+        missing = set(codes) - set(self.values_list('code', flat=True))
+        self.bulk_create([self.model(code=code) for code in sorted(missing)], batch_size=1000, ignore_conflicts=True)
+        return len(missing)
+
+    def allocate(self, _retry=True):
+        """
+        Reserve the lowest free code of the pool: a code no seller uses and that
+        is not reserved by another caller.
+
+        Free codes are picked with a single SELECT ... FOR UPDATE SKIP LOCKED,
+        so concurrent callers never get the same code and do not wait on each
+        other. The reservation expires after `reservation_time`, which gives
+        the caller time to register the seller.
+
+        Returns:
+            str: The reserved code, or None when every code is taken.
+        """
+        from seller.models import Seller
+
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            code = self.select_for_update(skip_locked=True).filter(
+                Q(reserved_until__isnull=True) | Q(reserved_until__lt=now)
+            ).exclude(
+                Exists(Seller.all_objects.filter(number_seller=OuterRef('code')))
+            ).order_by('code').first()
+            if code is None:
+                # The pool is filled by a migration; refill it in case it was emptied (e.g. by flush)
+                if _retry and self.fill():
+                    return self.allocate(_retry=False)
+                return None
+
+            code.reserved_until = now + self.reservation_time
+            code.save(update_fields=['reserved_until'])
+        return code.code
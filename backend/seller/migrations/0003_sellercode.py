@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+def fill_seller_codes(apps, schema_editor):
+    SellerCode = apps.get_model('seller', 'SellerCode')
+    SellerCode.objects.bulk_create(
+        (SellerCode(code=f'CAN-{number}') for number in range(1000, 10000)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seller', '0002_alter_seller_number_seller'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('reserved_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(fill_seller_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:07
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seller', '0003_sellercode'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='seller',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='seller_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seller',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='seller_last_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seller',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('dni'), name='gin_trgm_ops'), name='seller_dni_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seller',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('number_seller'), name='gin_trgm_ops'), name='seller_number_trgm_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from core.models import TimeStampedModel
+from seller.managers import SellerCodeManager
 from seller.validators import validate_no_spaces
 
 
@@ -12,5 +15,34 @@ class Seller(TimeStampedModel):
     phone = models.CharField(max_length=9, default='', null=False, blank=False)
     status = models.BooleanField(default=False, null=False, blank=False)
 
+    class Meta:
+        # Trigram indexes for the icontains searches (UPPER(field) LIKE '%term%'), see core.search
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='seller_name_trgm_idx'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='seller_last_name_trgm_idx'),
+            GinIndex(OpClass(Upper('dni'), name='gin_trgm_ops'), name='seller_dni_trgm_idx'),
+            GinIndex(OpClass(Upper('number_seller'), name='gin_trgm_ops'), name='seller_number_trgm_idx'),
+        ]
+
+    def __str__(self):
+        return self.name + ' ' + self.dni
+
+
+class SellerCode(models.Model):
+    """
+    Pool of the CAN-#### seller codes handed out by the generate-code action.
+
+    A code is free when no seller uses it and its reservation expired (see
+    SellerCodeManager.allocate).
+    """
+    PREFIX = 'CAN-'
+    FIRST_NUMBER = 1000
+    LAST_NUMBER = 9999
+
+    code = models.CharField(max_length=20, unique=True, null=False, blank=False)
+    reserved_until = models.DateTimeField(null=True, blank=True)
+
+    objects = SellerCodeManager()
+
     def __str__(self):
-        return self.name + ' ' + self.dni
\ No newline at end of file
+        return self.code
@@ -1,3 +1,61 @@
+import datetime
+from unittest import mock
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from assignment.models import Assignment
+from detail_assignment.models import DetailAssignment
+from product.models import Product
+from seller.models import Seller
+from seller.views import SellerViewSet
+from type_product.models import TypeProduct
+
+
+class UnpaidAssignmentTests(TestCase):
+    """
+    The unpaid-assignment report: three sellers, the first two with a pending line.
+    """
+    url = '/api/v1/sellers/unpaid-assignment/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cashier', password='secret')
+        type_product = TypeProduct.objects.create(name='PRODUCTO', type='PRODUCT')
+        product = Product.objects.create(name='Libro', type_product=type_product, base_price=10, total_quantity=100)
+        cls.sellers = Seller.objects.bulk_create([
+            Seller(name=f'Vendedor {index}', last_name='Quispe', number_seller=f'CAN-{1000 + index}',
+                   dni=f'{10000000 + index}', status=True)
+            for index in range(3)
+        ])
+        for seller, returned_amount in zip(cls.sellers[:2], (0, 4)):
+            assignment = Assignment.objects.create(seller=seller, date_assignment=datetime.date(2026, 10, 19))
+            DetailAssignment.objects.create(
+                assignment=assignment, product=product, quantity=10, returned_amount=returned_amount, unit_price=10
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_lists_every_seller_with_its_pending_lines(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([len(seller['assignments']) for seller in response.data], [1, 1, 0])
+
+    def test_paginates_the_sellers_and_their_lines(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 1, 'totals': 'true'})
+
+        self.assertEqual(response.data['count'], 3)
+        seller, = response.data['results']
+        self.assertEqual(seller['seller_id'], self.sellers[1].id)
+        self.assertEqual((seller['totals']['lines'], seller['totals']['total_pending']), (1, 60))
+
+    def test_refuses_the_unpaginated_report_over_the_cap(self):
+        with mock.patch.object(SellerViewSet, 'unpaid_assignment_max_sellers', 2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 400)
+
+            response = self.client.get(self.url, {'page_size': 2})
+            self.assertEqual(len(response.data['results']), 2)
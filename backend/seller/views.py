@@ -3,15 +3,18 @@ from rest_framework.response import Response
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Prefetch, Sum
 
 from core.pagination import CustomPagination
+from core.search import search_queryset
 from detail_assignment.models import DetailAssignment
 from detail_assignment.serializer import DetailAssignmentSerializer
-from seller.models import Seller
+from product.models import Product
+from seller.models import Seller, SellerCode
 from seller.serializer import SellerSerializer
 
-import secrets
+from collections import defaultdict
 
 class SellerViewSet(viewsets.ModelViewSet):
     # JWT Authentication
@@ -21,18 +24,20 @@ class SellerViewSet(viewsets.ModelViewSet):
     queryset = Seller.objects.all()
     serializer_class = SellerSerializer
     pagination_class = CustomPagination
+    # Queries per request, including the JWT user lookup (core.middleware)
+    query_budgets = {
+        'unpaid_assignment': {'queries': 5},
+    }
+    # Sellers of the unpaid assignment report when it is not paginated
+    unpaid_assignment_max_sellers = settings.PAGINATION_MAX_PAGE_SIZE
 
     def get_queryset(self):
         queryset = super().get_queryset()
         search = self.request.query_params.get('search', None)
 
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(dni__icontains=search) |
-                Q(number_seller__icontains=search)
-            ).distinct()
+            # Served by the trigram indexes of Seller, best match first
+            queryset = search_queryset(queryset, search, ['name', 'last_name', 'dni', 'number_seller'])
 
         return queryset  # El SoftDeleteManager ya filtra por delete_at__isnull=True
 
@@ -42,69 +47,130 @@ class SellerViewSet(viewsets.ModelViewSet):
         instance.soft_delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['get'], url_path='unpaid-assignment')
-    def unpaid_assignment(self, request):
+    def get_unpaid_lines(self, request, sellers):
+        """
+        Returns the pending detail assignments of the given sellers (a queryset
+        of ids, used as a subquery), filtered by the `start_date` and `end_date`
+        query parameters (on the return date).
+        """
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
-        # Filter the assignment by seller
+        detail_assignments = DetailAssignment.objects.filter(
+            status='PENDING',
+            assignment__seller__in=sellers
+        )
         if start_date and end_date:
-            detail_assignments = DetailAssignment.objects.filter(
-                status='PENDING',
-                return_date__range=[start_date, end_date]
-            ).select_related('assignment', 'assignment__seller')
+            detail_assignments = detail_assignments.filter(return_date__range=[start_date, end_date])
+        return detail_assignments
+
+    @staticmethod
+    def unpaid_seller_data(seller):
+        """
+        Returns the seller columns of the unpaid assignment report.
+        """
+        return {
+            'seller_id': seller.id,
+            'seller_name': f"{seller.name} {seller.last_name}",
+            'seller_code': seller.number_seller,
+            'seller_dni': seller.dni,
+            'seller_phone': seller.phone,
+            'seller_status': seller.status,
+        }
+
+    @action(detail=False, methods=['get'], url_path='unpaid-assignment')
+    def unpaid_assignment(self, request):
+        """
+        List every seller with its pending detail assignments.
+
+        The lines of all the sellers are fetched and serialized together, so
+        the number of queries does not depend on the number of sellers or
+        lines. The sellers are paginated when `page` or `page_size` is given;
+        otherwise the report is refused with a 400 when there are more than
+        `unpaid_assignment_max_sellers` sellers. With `totals=true` each seller
+        gets the totals of its pending lines instead of the lines.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: The sellers with their pending lines or totals.
+        """
+        queryset = Seller.objects.order_by('id')
+        paginate = any(param in request.query_params for param in (
+            self.paginator.page_query_param, self.paginator.page_size_query_param
+        ))
+        if paginate:
+            sellers = self.paginate_queryset(queryset)
+            # The same slice as the page, whose object_list is already a list
+            page = self.paginator.page
+            offset = (page.number - 1) * page.paginator.per_page
+            page_queryset = queryset[offset:offset + page.paginator.per_page]
+        else:
+            page_queryset = queryset[:self.unpaid_assignment_max_sellers + 1]
+            sellers = list(page_queryset)
+            if len(sellers) > self.unpaid_assignment_max_sellers:
+                return Response(
+                    {"error": f"There are more than {self.unpaid_assignment_max_sellers} sellers, "
+                              "request the report by pages with `page` and `page_size`."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # The page of sellers is filtered again as a subquery instead of a list of ids
+        detail_assignments = self.get_unpaid_lines(request, page_queryset.values('id'))
+
+        if request.query_params.get('totals', '').lower() == 'true':
+            amount_field = DecimalField(max_digits=14, decimal_places=2)
+            totals = {
+                row.pop('assignment__seller_id'): row
+                for row in detail_assignments.values('assignment__seller_id').annotate(
+                    lines=Count('id'),
+                    total_quantity=Sum('quantity'),
+                    total_returned_amount=Sum('returned_amount'),
+                    total_assignment=Sum(F('quantity') * F('unit_price'), output_field=amount_field),
+                    total_pending=Sum((F('quantity') - F('returned_amount')) * F('unit_price'), output_field=amount_field),
+                ).order_by()
+            }
+            empty_totals = {
+                'lines': 0, 'total_quantity': 0, 'total_returned_amount': 0, 'total_assignment': 0, 'total_pending': 0
+            }
+            result = [
+                {**self.unpaid_seller_data(seller), 'totals': totals.get(seller.id, empty_totals)}
+                for seller in sellers
+            ]
         else:
-            detail_assignments = DetailAssignment.objects.filter(
-                status='PENDING'
-            ).select_related('assignment', 'assignment__seller')
-
-        # Group the assignment by seller using dictionary
-        seller_dict = {}
-        
-        for detail_assignment in detail_assignments:
-            seller = detail_assignment.assignment.seller
-            
-            if seller.id not in seller_dict:
-                seller_dict[seller.id] = {
-                    'seller_id': seller.id,
-                    'seller_name': f"{seller.name} {seller.last_name}",
-                    'seller_code': seller.number_seller,
-                    'seller_dni': seller.dni,
-                    'seller_phone': seller.phone,
-                    'seller_status': seller.status,
-                    'assignments': []
-                }
-            
-            seller_dict[seller.id]['assignments'].append(DetailAssignmentSerializer(detail_assignment).data)
-        # Get all sellers to include those without pending assignments
-        all_sellers = Seller.objects.all().values_list('id', flat=True)
-        result = []
-        
-        for seller_id in all_sellers:
-            if seller_id in seller_dict:
-                result.append(seller_dict[seller_id])
-            else:
-                seller = Seller.objects.get(id=seller_id)
-                result.append({
-                    'seller_id': seller.id,
-                    'seller_name': f"{seller.name} {seller.last_name}",
-                    'seller_code': seller.number_seller,
-                    'seller_dni': seller.dni,
-                    'seller_phone': seller.phone,
-                    'seller_status': seller.status,
-                    'assignments': []
-                })
+            detail_assignments = list(detail_assignments.with_seller().annotate(
+                seller_id=F('assignment__seller_id')
+            ).prefetch_related(
+                Prefetch('product', queryset=Product.objects.for_serializer())
+            ).order_by('id'))
+            # Serialize every line at once and group them by seller
+            lines_by_seller = defaultdict(list)
+            serialized = DetailAssignmentSerializer(detail_assignments, many=True).data
+            for detail_assignment, data in zip(detail_assignments, serialized):
+                lines_by_seller[detail_assignment.seller_id].append(data)
+            result = [
+                {**self.unpaid_seller_data(seller), 'assignments': lines_by_seller.get(seller.id, [])}
+                for seller in sellers
+            ]
 
+        if paginate:
+            return self.get_paginated_response(result)
         return Response(result, status=status.HTTP_200_OK)
-    
+
     @action(detail=False, methods=['get'], url_path='generate-code')
     def generate_seller_code(self, request):
-        def generate_code():
-            return f"CAN-{secrets.randbelow(9000) + 1000}"
+        """
+        Reserve a free seller code for the seller being registered.
 
-        code = generate_code()
+        Args:
+            request (Request): The request object.
 
-        while Seller.objects.filter(number_seller=code).exists():
-            code = generate_code()
+        Returns:
+            Response: The reserved code.
+        """
+        code = SellerCode.objects.allocate()
+        if code is None:
+            return Response({"error": "There are no free seller codes left."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"code": code})
\ No newline at end of file
+        return Response({"code": code})
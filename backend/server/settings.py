@@ -52,6 +52,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'whitenoise.runserver_nostatic',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -68,9 +69,11 @@ INSTALLED_APPS = [
     'yape',
     'finance',
     'type_product',
+    'report',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -123,6 +126,9 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Let the frontend read the timings of core.middleware.QueryBudgetMiddleware
+CORS_EXPOSE_HEADERS = ['Server-Timing']
+
 SWAGGER_SETTINGS = {
     "USE_SESSION_AUTH": False,
     "SECURITY_DEFINITIONS": {
@@ -202,6 +208,9 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Maximum page size a client can request with the page_size parameter
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', 1000))
+
 # Django Simple JWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
@@ -233,14 +242,40 @@ else:
         },
     }
 
-# Use local in-memory cache instead of Redis
+# Use local in-memory cache instead of Redis. The in-memory cache is per
+# process, so deployments with several workers must point CACHE_BACKEND to a
+# shared backend (e.g. django.core.cache.backends.db.DatabaseCache after
+# running createcachetable, or django.core.cache.backends.redis.RedisCache)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', "django.core.cache.backends.locmem.LocMemCache")
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv('CACHE_LOCATION', "unique-snowflake"),
     }
 }
 
+# Cache the list/retrieve responses and the reconciliation of closed days.
+# They are invalidated by bumping versions stored in the cache, which other
+# workers only see with a shared backend, so it is off by default with the
+# in-memory cache
+CACHE_RESPONSES = os.getenv(
+    'CACHE_RESPONSES', str(CACHE_BACKEND != "django.core.cache.backends.locmem.LocMemCache")
+).lower() == 'true'
+
+# Seconds that list/retrieve responses of the cached viewsets stay cached
+CACHE_RESPONSE_TIMEOUT = int(os.getenv('CACHE_RESPONSE_TIMEOUT', 60 * 5))
+
+# Per-request query budget (core.middleware.QueryBudgetMiddleware). Requests
+# over budget are logged on the core.query_budget logger; viewsets can
+# override it per action with a query_budgets attribute
+QUERY_BUDGET = {
+    'queries': int(os.getenv('QUERY_BUDGET_QUERIES', 30)),
+    'sql_ms': float(os.getenv('QUERY_BUDGET_SQL_MS', 500)),
+}
+
+# Send the query count and timings of each request in a Server-Timing header
+QUERY_BUDGET_SERVER_TIMING = os.getenv('QUERY_BUDGET_SERVER_TIMING', str(DEBUG)).lower() == 'true'
+
 # Use DB-backed sessions to avoid relying on a cache backend for sessions
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
@@ -2,3 +2,6 @@ from django.apps import AppConfig
 class TypeProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'type_product'
+
+    def ready(self):
+        import type_product.signals  # noqa: F401
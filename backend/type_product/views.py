@@ -6,15 +6,19 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .models import TypeProduct
 from .serializer import TypeProductSerializer
 from .filters import TypeProductFilter
+from core.mixins import CacheResponseMixin
 from core.pagination import CustomPagination
 
 
 # Create your views here.
-class TypeProductViewSet(viewsets.ModelViewSet):
+class TypeProductViewSet(CacheResponseMixin, viewsets.ModelViewSet):
     # JWT authentication
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    # Cache of list and retrieve, invalidated by type_product.signals
+    cache_namespace = 'type_products'
+
     queryset = TypeProduct.objects.all()
     serializer_class = TypeProductSerializer
     pagination_class = CustomPagination
@@ -24,6 +28,10 @@ class TypeProductViewSet(viewsets.ModelViewSet):
     filterset_class = TypeProductFilter
 
     def list(self, request, *args, **kwargs):
+        # The default types of products are only checked when the list is not cached
+        return self.cached_response(request, self.list_with_default_types, *args, **kwargs)
+
+    def list_with_default_types(self, request, *args, **kwargs):
         # Names of types of products
         type_products = ['TROME', 'COMERCIO', 'GESTION', 'PERU 21', 'OJO']
 
@@ -40,4 +48,4 @@ class TypeProductViewSet(viewsets.ModelViewSet):
                 obj.save()
         
         #$ Continue with the method list
-        return super().list(request, *args, **kwargs)
+        return viewsets.ModelViewSet.list(self, request, *args, **kwargs)
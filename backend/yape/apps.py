@@ -2,3 +2,6 @@ from django.apps import AppConfig
 class YapeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'yape'
+
+    def ready(self):
+        import yape.signals  # noqa: F401
@@ -1,12 +1,14 @@
 import django_filters
+from core.filters import PeriodFilterSet
 from .models import Yape
 
 
-class YapeFilter(django_filters.FilterSet):
+class YapeFilter(PeriodFilterSet):
     """
     Filter for Yape model.
-    Allows filtering by date, operation code, and name.
+    Allows filtering by date, period, operation code, and name.
     """
+    period_field = 'date_yape'
     
     # Filter by name (case-insensitive partial match)
     name = django_filters.CharFilter(lookup_expr='icontains')
@@ -21,4 +23,4 @@ class YapeFilter(django_filters.FilterSet):
     
     class Meta:
         model = Yape
-        fields = ['name', 'operation_code', 'date_yape', 'date_yape_from', 'date_yape_to']
\ No newline at end of file
+        fields = ['name', 'operation_code', 'date_yape', 'date_yape_from', 'date_yape_to', 'year', 'month', 'quarter', 'week']
\ No newline at end of file
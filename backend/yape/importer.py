@@ -0,0 +1,225 @@
+"""
+Streaming import of the Yape payments of a bank statement CSV.
+"""
+import codecs
+import csv
+import datetime
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from .models import Yape
+
+# Accepted headers (normalized, see normalize_header) of each Yape field
+HEADERS = {
+    'name': ('name', 'nombre', 'origen', 'cliente', 'yapero'),
+    'amount': ('amount', 'monto', 'importe'),
+    'date_yape': ('date_yape', 'date', 'fecha', 'fecha_de_operacion', 'fecha_operacion'),
+    'operation_code': ('operation_code', 'codigo', 'codigo_de_operacion', 'nro_de_operacion',
+                       'numero_de_operacion', 'nro_operacion', 'operacion'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y')
+DELIMITERS = (',', ';', '\t', '|')
+# Encodings tried on each line when the encoding of a statement is not given:
+# UTF-8 and then cp1252, the encoding of the Spanish Excel exports
+DEFAULT_ENCODINGS = ('utf-8', 'cp1252')
+# Line numbers of the invalid rows reported back
+MAX_INVALID_LINES = 100
+# Amounts whose only separators are commas, or dots, followed by three digits,
+# e.g. 1,500, 1,234,567, 1.500 or 1.234.567 (but not 0.500)
+THOUSANDS = re.compile(r'[1-9]\d{0,2}(,\d{3})+|[1-9]\d{0,2}(\.\d{3})+')
+# An amount once its separators are normalized: digits and an optional decimal part
+NORMALIZED_AMOUNT = re.compile(r'\d+(\.\d+)?', re.ASCII)
+
+
+def normalize_header(header):
+    """
+    Lowercase a header without accents, with underscores instead of spaces and dots.
+    """
+    header = unicodedata.normalize('NFKD', header).encode('ascii', 'ignore').decode()
+    return '_'.join(header.lower().replace('.', ' ').replace('°', ' ').split())
+
+
+def parse_amount(value):
+    """
+    Parse an amount like `S/ 1,234.50`, `1,500`, `1.500`, `1.234,50`,
+    `1234,50`, `12.5` or `25`. Returns None when it is not a positive amount
+    (signs, exponents like `1e3`, NaN and Infinity are not amounts).
+
+    When both separators appear the last one is the decimal one. Otherwise a
+    comma or a dot followed by groups of exactly three digits separates
+    thousands, as in the bank statements, so `1.500` is 1500 and not 1.5, and
+    any other single comma or dot is the decimal separator.
+    """
+    value = value.upper().replace('S/', '').replace(' ', '').strip()
+    if ',' in value and '.' in value:
+        # The last separator is the decimal one
+        thousands = ',' if value.rfind('.') > value.rfind(',') else '.'
+        value = value.replace(thousands, '')
+    elif THOUSANDS.fullmatch(value):
+        value = value.replace(',', '').replace('.', '')
+    value = value.replace(',', '.')
+    if not NORMALIZED_AMOUNT.fullmatch(value):
+        return None
+    try:
+        amount = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        # More digits than the precision of the context
+        return None
+    return amount if amount > 0 else None
+
+
+def parse_date(value):
+    """
+    Parse the date of a row (a trailing time is ignored). Returns None when
+    it is empty and raises ValueError when it is not a date.
+    """
+    value = value.strip().split(' ')[0].split('T')[0]
+    if not value:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Invalid date: {value}')
+
+
+def decode_lines(lines, encoding=None):
+    """
+    Decode the lines of a CSV opened in binary mode, one at a time.
+
+    Each line is decoded strictly with `encoding` or, by default, with the
+    first of DEFAULT_ENCODINGS that accepts it (a leading UTF-8 BOM is
+    dropped), so undecodable bytes are rejected instead of replaced.
+
+    Raises:
+        ValueError: If the encoding is unknown or a line cannot be decoded.
+    """
+    encodings = (encoding,) if encoding else DEFAULT_ENCODINGS
+    try:
+        for name in encodings:
+            codecs.lookup(name)
+    except LookupError:
+        raise ValueError(f'Unknown encoding: {encoding}')
+
+    for line_number, line in enumerate(lines, start=1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        for name in encodings:
+            try:
+                yield line.decode(name)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError(f'Line {line_number} is not valid {" or ".join(encodings)} text')
+
+
+def read_rows(lines):
+    """
+    Read the rows of a CSV given as an iterable of text lines, one at a
+    time, detecting the delimiter from the header.
+
+    Yields:
+        tuple: The line number and the row as a dict by Yape field.
+
+    Raises:
+        ValueError: If the header does not have the name, amount and
+            operation code columns, or a line is not valid CSV.
+    """
+    lines = iter(lines)
+    header = next(lines, '')
+    delimiter = max(DELIMITERS, key=header.count)
+    columns = [normalize_header(column) for column in next(csv.reader([header], delimiter=delimiter), [])]
+
+    positions = {}
+    for field, names in HEADERS.items():
+        for name in names:
+            if name in columns:
+                positions[field] = columns.index(name)
+                break
+    missing = [field for field in ('name', 'amount', 'operation_code') if field not in positions]
+    if missing:
+        raise ValueError(f'Missing columns: {", ".join(missing)}')
+
+    rows = csv.reader(lines, delimiter=delimiter)
+    try:
+        for line_number, row in enumerate(rows, start=2):
+            if not any(value.strip() for value in row):
+                continue
+            yield line_number, {field: row[position] if position < len(row) else '' for field, position in positions.items()}
+    except csv.Error as error:
+        # The reader does not count the header line
+        raise ValueError(f'Line {rows.line_num + 1}: {error}')
+
+
+def build_payment(row):
+    """
+    Normalize a row into an unsaved Yape payment. Returns None when the row
+    is not valid.
+    """
+    name = ' '.join(row['name'].split())[:Yape._meta.get_field('name').max_length]
+    operation_code = row['operation_code'].strip()
+    amount = parse_amount(row['amount'])
+    try:
+        date_yape = parse_date(row.get('date_yape', ''))
+    except ValueError:
+        return None
+
+    max_code_length = Yape._meta.get_field('operation_code').max_length
+    if not name or amount is None or not operation_code or len(operation_code) > max_code_length:
+        return None
+    return Yape(name=name, amount=amount, date_yape=date_yape, operation_code=operation_code)
+
+
+def import_yapes(lines, batch_size=1000):
+    """
+    Import the Yape payments of a bank statement CSV, given as an iterable
+    of text lines (see decode_lines) so the file is read as it is imported,
+    never whole.
+
+    The rows are normalized and inserted in batches with one
+    INSERT ... ON CONFLICT (operation_code) DO NOTHING each, so the payments
+    already registered are skipped and importing the same statement again is
+    harmless. Each batch commits on its own.
+
+    Args:
+        lines (iterable): The lines of the CSV, header first.
+        batch_size (int): Rows read before each insert.
+
+    Returns:
+        dict: The number of rows `inserted`, `skipped` (operation code already
+            registered or repeated) and `invalid`, and the line numbers of the
+            first invalid rows.
+
+    Raises:
+        ValueError: If the header does not have the required columns or the
+            file is not valid CSV text. The batches inserted before stay.
+    """
+    result = {'inserted': 0, 'skipped': 0, 'invalid': 0, 'invalid_lines': []}
+    batch, codes = [], set()
+
+    def flush():
+        inserted = Yape.objects.insert_new(batch)
+        result['inserted'] += inserted
+        result['skipped'] += len(batch) - inserted
+        batch.clear()
+        codes.clear()
+
+    for line_number, row in read_rows(lines):
+        payment = build_payment(row)
+        if payment is None:
+            result['invalid'] += 1
+            if len(result['invalid_lines']) < MAX_INVALID_LINES:
+                result['invalid_lines'].append(line_number)
+            continue
+        if payment.operation_code in codes:
+            result['skipped'] += 1
+            continue
+        codes.add(payment.operation_code)
+        batch.append(payment)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return result
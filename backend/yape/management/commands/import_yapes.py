@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import bump_cache_version
+from yape.importer import decode_lines, import_yapes
+
+
+class Command(BaseCommand):
+    """
+    Import the Yape payments of a bank statement CSV.
+    """
+    help = 'Import the Yape payments of a bank statement CSV, skipping the operation codes already registered.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the CSV file.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Payments read before each insert.')
+        parser.add_argument(
+            '--encoding', help='Encoding of the file (UTF-8, falling back to cp1252, by default).'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be greater than 0.')
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_yapes(decode_lines(file, options['encoding']), options['batch_size'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+        finally:
+            # The bulk insert does not send the signals that invalidate the cached responses
+            bump_cache_version('yapes')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['inserted']} payment(s) inserted, {result['skipped']} skipped, {result['invalid']} invalid."
+        ))
+        if result['invalid_lines']:
+            self.stdout.write(f"Invalid lines: {', '.join(map(str, result['invalid_lines']))}")
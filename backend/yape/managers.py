@@ -0,0 +1,16 @@
+from core.managers import SoftDeleteManager
+from .querysets import YapeQuerySet
+
+
+class YapeManager(SoftDeleteManager):
+    """
+    Manager class of the alive Yape payments.
+    """
+    queryset_class = YapeQuerySet
+
+    def insert_new(self, payments):
+        """
+        Insert the payments whose operation code is not registered yet. See
+        YapeQuerySet.insert_new.
+        """
+        return self.get_queryset().insert_new(payments)
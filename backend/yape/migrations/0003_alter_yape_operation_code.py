@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('yape', '0002_yape_yape_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='yape',
+            name='operation_code',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from core.models import TimeStampedModel
+from .managers import YapeManager
 
 
 # Create your models here.
@@ -11,8 +12,15 @@ class Yape(TimeStampedModel):
     name = models.CharField(max_length=250, null=False, blank=False)
     amount = models.DecimalField(decimal_places=2, max_digits=255, null=False, blank=False)
     date_yape = models.DateField(null=True, blank=True)
-    operation_code = models.CharField(max_length=3, null=True, blank=True, unique=True)
+    operation_code = models.CharField(max_length=32, null=True, blank=True, unique=True)
 
+    objects = YapeManager()
+
+    class Meta:
+        indexes = [
+            # Date ranges of the filters (core.filters.PeriodFilterSet) and reports
+            models.Index(fields=['date_yape'], name='yape_date_idx'),
+        ]
 
     def __str__(self):
         return self.name+ ' ' + f'{self.date_yape}' + ' ' + f'{self.amount}'
@@ -0,0 +1,55 @@
+from django.db import connections
+from django.utils import timezone
+from core.querysets import SoftDeleteQuerySet
+
+
+class YapeQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of Yape payments with the bulk insert used by the imports.
+    """
+    insert_batch_size = 1000
+
+    def insert_new(self, payments):
+        """
+        Insert the payments with INSERT ... ON CONFLICT (operation_code) DO
+        NOTHING, so the payments already registered (or repeated in the
+        batch) are skipped by the database in the same statement.
+
+        Django's bulk_create(ignore_conflicts=True) does not tell which rows
+        were inserted, hence the raw SQL with RETURNING. Like bulk_create, it
+        skips Yape.save and the model signals.
+
+        Args:
+            payments (list): Unsaved Yape instances with an operation code.
+
+        Returns:
+            int: The number of payments inserted.
+        """
+        if not payments:
+            return 0
+
+        model = self.model
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        now = timezone.now()
+
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        operation_code = quote_name(model._meta.get_field('operation_code').column)
+        conflict = f'ON CONFLICT ({operation_code}) DO NOTHING RETURNING {quote_name(model._meta.pk.column)}'
+
+        inserted = 0
+        for start in range(0, len(payments), self.insert_batch_size):
+            batch = payments[start:start + self.insert_batch_size]
+            params = []
+            for payment in batch:
+                payment.create_at = payment.create_at or now
+                payment.update_at = now
+                params.extend(field.get_db_prep_save(getattr(payment, field.attname), connection) for field in fields)
+
+            values = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(batch))
+            sql = f'INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES {values} {conflict}'
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                inserted += len(cursor.fetchall())
+        return inserted
@@ -1,3 +1,83 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from yape.importer import decode_lines, import_yapes, parse_amount
+from yape.models import Yape
+
+
+class ParseAmountTests(SimpleTestCase):
+    """
+    parse_amount: the amount formats of the bank statements.
+    """
+
+    def test_parses_the_documented_formats(self):
+        amounts = {
+            'S/ 1,234.50': '1234.50',
+            's/25': '25.00',
+            '1,500': '1500.00',
+            '1,234,567': '1234567.00',
+            '1.500': '1500.00',
+            '1.234.567': '1234567.00',
+            '1.234,50': '1234.50',
+            '1234,50': '1234.50',
+            '12,5': '12.50',
+            '12.5': '12.50',
+            '0,500': '0.50',
+            '0.500': '0.50',
+            '1500.00': '1500.00',
+            '25': '25.00',
+        }
+        for value, amount in amounts.items():
+            with self.subTest(value=value):
+                self.assertEqual(parse_amount(value), Decimal(amount))
+
+    def test_rejects_what_is_not_a_positive_amount(self):
+        for value in ('', '0', '0,00', '-5', '+5', '1e3', '1E3', 'NaN', 'Infinity', 'abc', '1.2.3', '1,2,3', '12..5',
+                      '١٢'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_amount(value))
+
+
+class ImportYapesTests(TestCase):
+    """
+    import_yapes with the lines of a statement decoded by decode_lines.
+    """
+
+    def import_statement(self, text, encoding='utf-8', **kwargs):
+        return import_yapes(decode_lines(text.encode(encoding).splitlines(keepends=True)), **kwargs)
+
+    def test_imports_the_valid_rows_and_skips_the_registered_codes(self):
+        statement = (
+            '﻿Fecha;Nombre;Monto;Nro. de operación\n'
+            '19/10/2026;José  Núñez;S/ 1.500;A1\n'
+            '19/10/2026;Ana Quispe;abc;A2\n'
+            '19/10/2026;Ana Quispe;12,50;A1\n'
+            '\n'
+            '20/10/2026;Ana Quispe;12,50;A3\n'
+        )
+
+        result = self.import_statement(statement, batch_size=1)
+
+        self.assertEqual(result, {'inserted': 2, 'skipped': 1, 'invalid': 1, 'invalid_lines': [3]})
+        self.assertEqual(
+            list(Yape.objects.order_by('operation_code').values_list('name', 'amount', 'operation_code')),
+            [('José Núñez', Decimal('1500.00'), 'A1'), ('Ana Quispe', Decimal('12.50'), 'A3')]
+        )
+        self.assertEqual(self.import_statement(statement)['skipped'], 3)
+
+    def test_falls_back_to_cp1252(self):
+        self.import_statement('nombre,monto,codigo\nJosé Núñez,10,A1\n', encoding='cp1252')
+        self.assertEqual(Yape.objects.get().name, 'José Núñez')
+
+    def test_rejects_undecodable_lines_and_invalid_csv(self):
+        with self.assertRaisesMessage(ValueError, 'Line 2 is not valid utf-8 text'):
+            import_yapes(decode_lines([b'nombre,monto,codigo\n', b'Jos\xe9,10,A1\n'], 'utf-8'))
+        with self.assertRaisesMessage(ValueError, 'Unknown encoding: latin-9000'):
+            import_yapes(decode_lines([b'nombre,monto,codigo\n'], 'latin-9000'))
+        with self.assertRaisesMessage(ValueError, 'Line 2:'):
+            # A field larger than the limit of the csv module
+            self.import_statement(f'nombre,monto,codigo\n{"A" * 200000},10,A1\n')
+
+    def test_rejects_a_header_without_the_required_columns(self):
+        with self.assertRaisesMessage(ValueError, 'Missing columns: operation_code'):
+            self.import_statement('nombre,monto\nAna,10\n')
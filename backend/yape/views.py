@@ -1,24 +1,66 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .importer import decode_lines, import_yapes
 from .models import Yape
 from .serializer import YapeSerializer
 from .filters import YapeFilter
-from core.pagination import CustomPagination
+from core.cache import bump_cache_version
+from core.mixins import CacheResponseMixin
+from core.pagination import OptionalKeysetPagination
 
 
 # Create your views here.
-class YapeViewSet(viewsets.ModelViewSet):
+class YapeViewSet(CacheResponseMixin, viewsets.ModelViewSet):
     # JWT authentication
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    # Cache of list and retrieve, invalidated by yape.signals
+    cache_namespace = 'yapes'
+
     queryset = Yape.objects.all().order_by('-date_yape')
     serializer_class = YapeSerializer
-    pagination_class = CustomPagination
+    pagination_class = OptionalKeysetPagination
+    # date_yape is nullable, so the keyset only uses the id
+    keyset_ordering = ('-id',)
 
     # Settings of filters
     filter_backends = [DjangoFilterBackend]
     filterset_class = YapeFilter
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_statement(self, request):
+        """
+        Import the Yape payments of a bank statement CSV sent as `file`,
+        in the optional `encoding` (UTF-8, falling back to cp1252, by default).
+
+        The file is read line by line while the payments are inserted in
+        batches (see yape.importer), and the payments whose operation code is
+        already registered are skipped, so the same statement can be imported
+        again safely.
+
+        Args:
+            request (Request): The request object with the CSV `file` and its `encoding`.
+
+        Returns:
+            Response: The number of payments inserted, skipped and invalid.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV file is required in the `file` field'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = import_yapes(decode_lines(upload, request.data.get('encoding') or None))
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            # The bulk insert does not send the signals that invalidate the cached responses
+            bump_cache_version(self.cache_namespace)
+
+        return Response(result, status=status.HTTP_201_CREATED if result['inserted'] else status.HTTP_200_OK)